@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'book_service.settings')
 
 application = get_asgi_application()
+
+# The async related-books endpoint is served from here; build its local
+# index (books/similar.py) at startup instead of on the first request.
+from books.views import related_books  # noqa: E402
+
+related_books.start()
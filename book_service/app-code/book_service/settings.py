@@ -72,10 +72,29 @@ WSGI_APPLICATION = 'book_service.wsgi.application'
 
 
 # Rest Framework
+# JSON goes through orjson when it is installed (see books/renderers.py).
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'books.renderers.FastJSONRenderer',
     ),
+    'DEFAULT_PARSER_CLASSES': (
+        'books.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Book read cache (see books/cache.py)
+# SHARED_ALIAS names an entry in CACHES (e.g. a Redis or Memcached backend)
+# shared by every worker; leave it as None to use the in-process tier only.
+# A write only refreshes the in-process tier of the worker that made it, so
+# the other gunicorn workers can serve a book up to LOCAL_TTL seconds older
+# than its last write (with or without a shared tier). Keep it short.
+BOOK_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "LOCAL_TTL": 5,
+    "SHARED_ALIAS": None,
+    "SHARED_TTL": 300,
 }
 
 # Database
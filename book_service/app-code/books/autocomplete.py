@@ -0,0 +1,264 @@
+import heapq
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import groupby
+
+from .similar import STOPWORDS
+
+# ------------------------------------------------------------
+# Type-ahead on book titles and authors
+# ------------------------------------------------------------
+# A sorted array of normalized keys searched with bisect. Every book
+# contributes its full title, its author, and the same strings starting at
+# each later (non-stopword) word, so "hob" finds "The Hobbit" and "tolk"
+# finds "Tolkien, J.". keys[i] belongs to book refs[i]; refs is an int array
+# to keep the per-entry footprint small.
+#
+# A prefix names a contiguous slice of keys, and the best `top_k` books of
+# that slice are the answer. Slices of at most `scan_limit` keys are ranked
+# on the fly. Larger ones (short prefixes such as "t", or common openings
+# such as "the lo") have their answers precomputed at build time, or
+# memoized on first use if a slice grows past the limit later, and patched
+# on upsert. So a lookup never ranks more than `scan_limit` keys.
+#
+# Books are ranked by `score` (higher first, see AUTOCOMPLETE_SCORE_FIELD in
+# views.py), then by title.
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_KEY_END = "\U0010ffff"                 # sorts after every character we store
+LATENCY_SAMPLES = 1000
+
+
+def normalize(text):
+    return _NON_WORD_RE.sub(" ", text.casefold()).strip()
+
+
+def completion_keys(title, author, max_word_starts=8):
+    keys = []
+    for text in (title, author):
+        words = normalize(text).split()
+        if not words:
+            continue
+        keys.append(" ".join(words))
+        starts = [i for i in range(1, len(words)) if len(words[i]) > 1 and words[i] not in STOPWORDS]
+        keys.extend(" ".join(words[i:]) for i in starts[:max_word_starts])
+    return list(dict.fromkeys(keys))
+
+
+class PrefixIndex:
+    def __init__(self, score_field="quantity", top_k=10, scan_limit=256, max_word_starts=8):
+        self.score_field = score_field
+        self.top_k = top_k
+        self.scan_limit = scan_limit
+        self.max_word_starts = max_word_starts
+        self._lock = threading.RLock()
+        self._built = False
+        self._reset()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {"builds": 0, "upserts": 0, "lookups": 0, "build_seconds": 0.0}
+
+    def _reset(self):
+        self.keys = []                                  # sorted normalized keys
+        self.refs = array("i")                          # keys[i] belongs to book refs[i]
+        self.books = []                                 # id -> (isbn, title, author, score)
+        self.ids = {}                                   # isbn -> id
+        self.top = {}                                   # prefix of a large slice -> [id, ...] best first
+        self._key_bytes = 0
+
+    @property
+    def ready(self):
+        return self._built
+
+    def _rank(self, id):
+        isbn, title, _, score = self.books[id]
+        return (-score, title, isbn)
+
+    def _keys_for(self, title, author):
+        return completion_keys(title, author, self.max_word_starts)
+
+    # --------------------------------------------------------
+    # Building
+    # --------------------------------------------------------
+    def build(self, rows=None):
+        """
+        (Re)build from `rows` of (ISBN, title, Author, score); defaults to
+        reading the whole Book table.
+        """
+        if rows is None:
+            from .models import Book
+            rows = Book.objects.values_list("ISBN", "title", "Author", self.score_field).iterator(chunk_size=2000)
+        started = time.perf_counter()
+        with self._lock:
+            self._reset()
+            pairs = []
+            for isbn, title, author, score in rows:
+                id = len(self.books)
+                self.books.append((isbn, title, author, score))
+                self.ids[isbn] = id
+                pairs.extend((key, id) for key in self._keys_for(title, author))
+            pairs.sort()
+            self.keys = [key for key, _ in pairs]
+            self.refs = array("i", (id for _, id in pairs))
+            self._key_bytes = sum(sys.getsizeof(key) for key in self.keys)
+            self._precompute()
+            self._built = True
+        self.stats["builds"] += 1
+        self.stats["build_seconds"] = round(time.perf_counter() - started, 4)
+
+    def _precompute(self):
+        # Keys are sorted, so the keys sharing their first d characters form
+        # a contiguous range. Each depth only splits the ranges that were
+        # still too large at the previous depth.
+        keys, refs = self.keys, self.refs
+        ranges, d = [(0, len(keys))], 0
+        while ranges:
+            d += 1
+            larger = []
+            for lo, hi in ranges:
+                # A key equal to the parent prefix sorts first; skip it.
+                while lo < hi and len(keys[lo]) < d:
+                    lo += 1
+                for prefix, group in groupby(range(lo, hi), key=lambda i: keys[i][d - 1]):
+                    group = list(group)
+                    if len(group) > self.scan_limit:
+                        start, end = group[0], group[-1] + 1
+                        self.top[keys[start][:d]] = heapq.nsmallest(
+                            self.top_k, set(refs[start:end]), key=self._rank
+                        )
+                        larger.append((start, end))
+            ranges = larger
+
+    def reset(self):
+        """Drop the index (e.g. after a bulk import); it is rebuilt on next use."""
+        with self._lock:
+            self._built = False
+            self._reset()
+
+    def ensure_built(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self.build()
+
+    # --------------------------------------------------------
+    # Incremental maintenance
+    # --------------------------------------------------------
+    def upsert(self, isbn, title, author, score):
+        """Add or re-rank one book. A no-op until the index has been built."""
+        if not self._built:
+            return
+        with self._lock:
+            id = self.ids.get(isbn)
+            if id is None:
+                id = self.ids[isbn] = len(self.books)
+                self.books.append((isbn, title, author, score))
+                old_keys = []
+            else:
+                old_keys = self._keys_for(*self.books[id][1:3])
+            for key in old_keys:
+                self._delete(key, id)
+            self.books[id] = (isbn, title, author, score)
+            new_keys = self._keys_for(title, author)
+            for key in new_keys:
+                self._insert(key, id)
+
+            new_prefixes = self._known_prefixes(new_keys)
+            for prefix in self._known_prefixes(old_keys) | new_prefixes:
+                self._patch_top(prefix, id, prefix in new_prefixes)
+            self.stats["upserts"] += 1
+
+    def rescore(self, isbn, score):
+        """Re-rank a known book whose score changed (e.g. its quantity)."""
+        with self._lock:
+            id = self.ids.get(isbn) if self._built else None
+            if id is None:
+                return
+            _, title, author, _ = self.books[id]
+            self.upsert(isbn, title, author, score)
+
+    def _known_prefixes(self, keys):
+        # Only prefixes with a stored answer need patching.
+        return {key[:d] for key in keys for d in range(1, len(key) + 1) if key[:d] in self.top}
+
+    def _insert(self, key, id):
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.refs.insert(i, id)
+        self._key_bytes += sys.getsizeof(key)
+
+    def _delete(self, key, id):
+        i = bisect_left(self.keys, key)
+        while self.refs[i] != id:
+            i += 1
+        del self.keys[i]
+        del self.refs[i]
+        self._key_bytes -= sys.getsizeof(key)
+
+    def _patch_top(self, prefix, id, matches):
+        current = self.top.get(prefix, [])
+        if id in current:
+            # Its rank changed or it left the prefix: rescan that prefix only.
+            top = self._scan(prefix, self.top_k)
+        elif matches and (len(current) < self.top_k or self._rank(id) < self._rank(current[-1])):
+            top = sorted(current + [id], key=self._rank)[: self.top_k]
+        else:
+            return
+        if top:
+            self.top[prefix] = top
+        else:
+            self.top.pop(prefix, None)
+
+    def _scan(self, prefix, limit):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _KEY_END, lo)
+        if hi - lo <= self.scan_limit:
+            return heapq.nsmallest(limit, set(self.refs[lo:hi]), key=self._rank)
+        # Grew past the limit since the build: rank once, then keep it patched.
+        top = self.top[prefix] = heapq.nsmallest(self.top_k, set(self.refs[lo:hi]), key=self._rank)
+        return top[:limit]
+
+    # --------------------------------------------------------
+    # Lookups
+    # --------------------------------------------------------
+    def complete(self, text, limit=None):
+        """Best books whose title or author has a word starting with `text`."""
+        started = time.perf_counter()
+        limit = min(limit or self.top_k, self.top_k)
+        prefix = normalize(text)
+        with self._lock:
+            if not prefix:
+                ids = []
+            elif prefix in self.top:
+                ids = self.top[prefix][:limit]
+            else:
+                ids = self._scan(prefix, limit)
+            result = [
+                {"ISBN": isbn, "title": title, "Author": author}
+                for isbn, title, author, _ in (self.books[id] for id in ids)
+            ]
+        self.stats["lookups"] += 1
+        self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            entries = len(self.keys)
+            entry_bytes = self._key_bytes + entries * (8 + self.refs.itemsize)   # key + list slot + ref
+            top_bytes = sum(sys.getsizeof(ids) for ids in self.top.values())
+            latencies = sorted(self._latencies)
+        return {
+            **self.stats,
+            "ready": self._built,
+            "books": len(self.ids),
+            "entries": entries,
+            "precomputed_prefixes": len(self.top),
+            "bytes_per_entry": round(entry_bytes / entries, 1) if entries else 0,
+            "index_bytes": entry_bytes + top_bytes,
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 4) if latencies else None,
+            "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 4) if latencies else None,
+        }
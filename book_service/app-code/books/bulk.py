@@ -0,0 +1,225 @@
+import csv
+import json
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from .models import Book
+from .serializers import PRICE_ERROR, PRICE_RE
+
+# ------------------------------------------------------------
+# Streaming bulk import for books
+# ------------------------------------------------------------
+# Rows are read one line at a time from the request stream (NDJSON or CSV
+# with a header row), validated by a lightweight checker that mirrors
+# BookSerializer's rules and messages, and written with bulk_create in
+# chunks, one transaction per chunk. Only the current chunk and a capped
+# error report are held in memory, so memory use does not grow with the
+# size of the upload.
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json")
+CSV_TYPES = ("text/csv", "application/csv")
+
+CHAR_FIELDS = (("ISBN", 20), ("title", 255), ("Author", 255), ("genre", 50))
+UPDATE_FIELDS = ["title", "Author", "description", "genre", "price", "quantity"]
+INT_MIN, INT_MAX = -2147483648, 2147483647
+_INT_DECIMAL_RE = re.compile(r"\.0*\s*$")
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+# ------------------------------------------------------------
+# Parsing
+# ------------------------------------------------------------
+def iter_rows(stream, content_type):
+    """
+    Yield (row_number, row) from `stream`; row is a dict, or None when the
+    line could not be parsed at all.
+    """
+    if content_type in NDJSON_TYPES:
+        return _iter_ndjson(stream)
+    if content_type in CSV_TYPES:
+        return _iter_csv(stream)
+    raise UnsupportedFormat(content_type)
+
+
+def _iter_ndjson(stream):
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _iter_csv(stream):
+    lines = (line.decode("utf-8-sig") if isinstance(line, bytes) else line for line in stream)
+    for number, row in enumerate(csv.DictReader(lines), start=1):
+        yield number, row
+
+
+# ------------------------------------------------------------
+# Validation (same rules and messages as BookSerializer)
+# ------------------------------------------------------------
+def validate_row(row):
+    """Return (field values, None) for a valid row or (None, errors)."""
+    values, errors = {}, {}
+    for name, max_length in CHAR_FIELDS + (("description", None),):
+        value = row.get(name)
+        if value is None:
+            errors[name] = ["This field is required." if name not in row else "This field may not be null."]
+            continue
+        if isinstance(value, (bool, dict, list)):
+            errors[name] = ["Not a valid string."]
+            continue
+        value = str(value).strip()
+        if not value:
+            errors[name] = ["This field may not be blank."]
+        elif max_length and len(value) > max_length:
+            errors[name] = [f"Ensure this field has no more than {max_length} characters."]
+        else:
+            values[name] = value
+
+    price = row.get("price")
+    if price is None:
+        errors["price"] = ["This field is required." if "price" not in row else "This field may not be null."]
+    elif not PRICE_RE.match(str(price)):
+        errors["price"] = [PRICE_ERROR]
+    else:
+        try:
+            price = Decimal(str(price))
+        except InvalidOperation:
+            errors["price"] = ["Invalid price format."]
+        else:
+            if len(price.as_tuple().digits) - 2 > 8:
+                errors["price"] = ["Ensure that there are no more than 8 digits before the decimal point."]
+            else:
+                values["price"] = price
+
+    quantity = row.get("quantity")
+    if quantity is None:
+        errors["quantity"] = ["This field is required." if "quantity" not in row else "This field may not be null."]
+    elif isinstance(quantity, bool):
+        errors["quantity"] = ["A valid integer is required."]
+    else:
+        try:
+            quantity = int(_INT_DECIMAL_RE.sub("", str(quantity)))
+        except ValueError:
+            errors["quantity"] = ["A valid integer is required."]
+        else:
+            if quantity > INT_MAX:
+                errors["quantity"] = [f"Ensure this value is less than or equal to {INT_MAX}."]
+            elif quantity < INT_MIN:
+                errors["quantity"] = [f"Ensure this value is greater than or equal to {INT_MIN}."]
+            else:
+                values["quantity"] = quantity
+
+    return (None, errors) if errors else (values, None)
+
+
+# ------------------------------------------------------------
+# Import
+# ------------------------------------------------------------
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, number, isbn, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": number, "ISBN": isbn, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "received": self.received,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_books(rows, upsert=False, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """
+    Validate and write `rows` (from iter_rows). With `upsert` existing ISBNs
+    are overwritten, otherwise they are reported as duplicates. `on_chunk`
+    is called with the ISBNs of every committed chunk.
+    """
+    report = ImportReport()
+    chunk = {}                                  # ISBN -> (row number, values)
+    superseded = []                             # (row number, ISBN) overwritten within the chunk
+    for number, row in rows:
+        report.received += 1
+        if row is None:
+            report.fail(number, None, {"non_field_errors": ["Malformed row."]})
+            continue
+        values, errors = validate_row(row)
+        if errors:
+            report.fail(number, row.get("ISBN"), errors)
+            continue
+        if values["ISBN"] in chunk:
+            # Same ISBN twice in one chunk: the later row wins only on upsert,
+            # and the earlier one is counted as updated (by it) once written.
+            if not upsert:
+                report.fail(number, values["ISBN"], {"ISBN": ["Duplicate ISBN in this upload."]})
+                continue
+            superseded.append((chunk[values["ISBN"]][0], values["ISBN"]))
+        chunk[values["ISBN"]] = (number, values)
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, upsert, report, on_chunk, superseded)
+            chunk, superseded = {}, []
+    if chunk:
+        _write_chunk(chunk, upsert, report, on_chunk, superseded)
+    return report
+
+
+def _write_chunk(chunk, upsert, report, on_chunk, superseded=()):
+    try:
+        with transaction.atomic():
+            existing = set(Book.objects.filter(ISBN__in=list(chunk)).values_list("ISBN", flat=True))
+            if not upsert:
+                for isbn in existing:
+                    number, _ = chunk.pop(isbn)
+                    report.fail(number, isbn, {"ISBN": ["This ISBN already exists in the system."]})
+            books = [Book(**values) for _, values in chunk.values()]
+            if upsert:
+                Book.objects.bulk_create(
+                    books,
+                    update_conflicts=True,
+                    update_fields=UPDATE_FIELDS,
+                    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target.
+                    unique_fields=["ISBN"] if connection.features.supports_update_conflicts_with_target else None,
+                )
+                # Overwritten rows are new versions; inserted ones start at 1.
+                Book.objects.filter(ISBN__in=existing).update(version=F("version") + 1)
+            else:
+                Book.objects.bulk_create(books)
+    except DatabaseError as exc:
+        error = {"non_field_errors": [f"Database error: {exc}"]}
+        for isbn, (number, _) in chunk.items():
+            report.fail(number, isbn, error)
+        for number, isbn in superseded:
+            report.fail(number, isbn, error)
+        return
+
+    report.updated += (len(existing) + len(superseded)) if upsert else 0
+    report.created += len(chunk) - (len(existing) if upsert else 0)
+    if on_chunk is not None and chunk:
+        on_chunk(list(chunk))
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Book
+
+# ------------------------------------------------------------
+# Two-tier read-through cache for serialized Book representations
+# ------------------------------------------------------------
+#   tier 1: bounded in-process LRU (always on)
+#   tier 2: optional shared cache, one of the aliases in settings.CACHES
+#
+# Writes go through refresh()/invalidate(), which update both tiers so a
+# reader in this process never sees a price or quantity older than the
+# last successful write. Other worker processes only drop their in-process
+# copy when it expires: they can serve a book up to LOCAL_TTL seconds older
+# than its last write, which is why LOCAL_TTL defaults to a few seconds.
+# Within that bound the shared tier (if any) saves them the database query.
+#
+# Entries are CachedBook(data, version): the representation plus the row
+# version it was built from, so conditional GETs can be answered from the
+# cache without serializing anything.
+#
+# Every write bumps a book's version, so the shared tier only ever moves to a
+# newer version: a worker whose load read the row just before another
+# worker's write cannot put the older copy back afterwards (_store_shared).
+# invalidate() leaves a CachedBook(None, version) tombstone there rather
+# than deleting the key, so such a late load is refused too.
+
+DEFAULTS = {
+    "MAX_ENTRIES": 10000,   # LRU capacity of the in-process tier (0 disables it)
+    "LOCAL_TTL": 5,         # seconds an entry lives in the in-process tier (staleness bound)
+    "SHARED_ALIAS": None,   # e.g. "books" -> settings.CACHES["books"]
+    "SHARED_TTL": 300,      # seconds an entry lives in the shared tier
+    "KEY_PREFIX": "book:",
+}
+
+CachedBook = namedtuple("CachedBook", "data version")
+
+
+class BookCache:
+    def __init__(self, max_entries, local_ttl, shared_alias=None, shared_ttl=300, key_prefix="book:"):
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.shared_alias = shared_alias
+        self.shared_ttl = shared_ttl
+        self.key_prefix = key_prefix
+        self._entries = OrderedDict()       # isbn -> (expires_at, CachedBook)
+        self._lock = threading.Lock()
+        self._writes = 0                    # bumped on every write, guards racing loads
+        self._counters = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "evictions": 0,
+        }
+
+    @classmethod
+    def from_settings(cls):
+        conf = {**DEFAULTS, **getattr(settings, "BOOK_CACHE", {})}
+        return cls(
+            max_entries=conf["MAX_ENTRIES"],
+            local_ttl=conf["LOCAL_TTL"],
+            shared_alias=conf["SHARED_ALIAS"],
+            shared_ttl=conf["SHARED_TTL"],
+            key_prefix=conf["KEY_PREFIX"],
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    # --------------------------------------------------------
+    # Reads
+    # --------------------------------------------------------
+    def get(self, isbn):
+        """Return the CachedBook for `isbn`, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(isbn)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(isbn)
+                    self._counters["local_hits"] += 1
+                    return entry[1]
+                del self._entries[isbn]
+
+        if self.shared is not None:
+            data = self.shared.get(self.key_prefix + isbn)
+            # Tombstones, and anything written by an older release, are misses.
+            if isinstance(data, CachedBook) and data.data is not None:
+                with self._lock:
+                    self._counters["shared_hits"] += 1
+                    self._store_local(isbn, data)
+                return data
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def get_or_load(self, isbn, loader):
+        """
+        Read-through lookup. `loader()` builds the CachedBook on a miss;
+        exceptions it raises (e.g. Http404) propagate and nothing is cached.
+        """
+        data = self.get(isbn)
+        if data is not None:
+            return data
+        return self.load(isbn, loader)
+
+    def load(self, isbn, loader):
+        """The miss half of get_or_load(), for callers that already looked."""
+        token = self._writes
+        data = loader()
+        with self._lock:
+            # A write landed while we were loading: our copy may predate it.
+            if token != self._writes:
+                return data
+            self._store_local(isbn, data)
+        self._store_shared({isbn: data})
+        return data
+
+    def get_many_or_load(self, isbns, loader):
+        """
+        Batch read-through lookup. `loader(missing_isbns)` returns
+        {isbn: CachedBook} for the ones that exist; unknown ISBNs are
+        simply absent from the result.
+        """
+        found, missing = {}, []
+        for isbn in isbns:
+            data = self.get(isbn)
+            if data is None:
+                missing.append(isbn)
+            else:
+                found[isbn] = data
+        if not missing:
+            return found
+        token = self._writes
+        loaded = loader(missing)
+        found.update(loaded)
+        with self._lock:
+            if token != self._writes:
+                return found
+            for isbn, data in loaded.items():
+                self._store_local(isbn, data)
+        self._store_shared(loaded)
+        return found
+
+    # --------------------------------------------------------
+    # Writes
+    # --------------------------------------------------------
+    def refresh(self, isbn, data, version):
+        """Replace the entry for `isbn` after a successful write."""
+        data = CachedBook(dict(data), version)
+        with self._lock:
+            self._writes += 1
+            self._store_local(isbn, data)
+        self._store_shared({isbn: data})
+
+    def invalidate(self, *isbns):
+        """
+        Drop entries whose rows were changed without a fresh representation.
+        Call it after the change has committed.
+        """
+        with self._lock:
+            self._writes += 1
+            for isbn in isbns:
+                self._entries.pop(isbn, None)
+            self._counters["invalidations"] += len(isbns)
+        if self.shared is not None and isbns:
+            # Tombstone the committed versions; deleted books simply go.
+            versions = dict(Book.objects.filter(ISBN__in=isbns).values_list("ISBN", "version"))
+            self.shared.delete_many([self.key_prefix + isbn for isbn in isbns if isbn not in versions])
+            self._store_shared({isbn: CachedBook(None, version) for isbn, version in versions.items()})
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    def _store_shared(self, entries):
+        """
+        Write {isbn: CachedBook} to the shared tier, never over a newer
+        version. add() claims an empty key atomically; an existing entry is
+        compared and replaced. Django's cache API has no compare-and-set, so
+        a newer write landing between that get and set can still be lost.
+        """
+        if self.shared is None or not entries:
+            return
+        entries = {self.key_prefix + isbn: data for isbn, data in entries.items()}
+        current = self.shared.get_many(list(entries))
+        replace = {}
+        for key, data in entries.items():
+            existing = current.get(key)
+            if existing is None:
+                if self.shared.add(key, data, self.shared_ttl):
+                    continue
+                existing = self.shared.get(key)
+            if not isinstance(existing, CachedBook) or existing.version <= data.version:
+                replace[key] = data
+        if replace:
+            self.shared.set_many(replace, self.shared_ttl)
+
+    def _store_local(self, isbn, data):
+        # Caller holds self._lock.
+        if self.max_entries <= 0:
+            return
+        self._entries[isbn] = (time.monotonic() + self.local_ttl, data)
+        self._entries.move_to_end(isbn)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    # --------------------------------------------------------
+    # Monitoring
+    # --------------------------------------------------------
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["local_hits"] + counters["shared_hits"] + counters["misses"]
+        hits = counters["local_hits"] + counters["shared_hits"]
+        return {
+            **counters,
+            "size": size,
+            "max_entries": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "shared_alias": self.shared_alias,
+        }
+
+
+book_cache = BookCache.from_settings()
@@ -0,0 +1,204 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+# ------------------------------------------------------------
+# Cross-worker circuit breaker
+# ------------------------------------------------------------
+# The breaker state lives in a tiny shared-memory segment (a file under
+# /dev/shm mapped with mmap), so every worker process on the pod sees the
+# same CLOSED / OPEN / HALF_OPEN state. State reads are plain memory loads
+# guarded by a sequence counter; the state is only written, under an flock,
+# when it actually changes.
+#
+# The rolling failure window is in the segment too, so the failure rate is
+# that of the whole pod and all workers trip together. Every recorded call
+# updates it under the flock.
+#
+# Segment layout (little endian):
+#   header  seq (u64) | state (u64) | opened_at (f64) | probe_started (f64)
+#   window  `window_secs` buckets of second (i64) | successes (u32) | failures (u32),
+#           bucket i holding the calls of a second with second % window_secs == i
+# `seq` is odd while a writer is mid-update; readers retry until it is even
+# and unchanged across their read.
+
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+STATE_NAMES = {CLOSED: "closed", OPEN: "open", HALF_OPEN: "half_open"}
+
+_LAYOUT = struct.Struct("<QQdd")
+_BUCKET = struct.Struct("<qII")
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        path,
+        open_interval=60,
+        failure_rate_threshold=0.5,
+        minimum_calls=5,
+        window_secs=30,
+        probe_timeout=None,
+    ):
+        self.path = path
+        self.open_interval = open_interval                  # stay OPEN this long before probing
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls                  # calls needed before the rate counts
+        self.window_secs = window_secs                      # rolling window length
+        self.probe_timeout = probe_timeout or open_interval # reclaim a probe that never reported
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+        self._size = _LAYOUT.size + _BUCKET.size * window_secs
+        self._transitions = 0
+
+    # --------------------------------------------------------
+    # Shared segment
+    # --------------------------------------------------------
+    def _segment(self):
+        # Re-open after fork: an flock taken on an inherited descriptor would
+        # be shared with the parent and exclude nothing.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._open_segment()
+        return self._map
+
+    def _open_segment(self):
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < self._size:
+                os.ftruncate(fd, self._size)
+            self._fd, self._map = fd, mmap.mmap(fd, self._size)
+        except OSError:
+            # No writable shared location: fall back to a process-private segment.
+            self._fd, self._map = None, mmap.mmap(-1, self._size)
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the segment, across threads and processes."""
+        seg = self._segment()
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield seg
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _read(self):
+        seg = self._segment()
+        while True:
+            seq, state, opened_at, probe_started = _LAYOUT.unpack_from(seg, 0)
+            if seq % 2 == 0 and struct.unpack_from("<Q", seg, 0)[0] == seq:
+                return state, opened_at, probe_started
+
+    def _transition(self, expected, new_state, opened_at=0.0, probe_started=0.0):
+        """
+        Atomically move to `new_state` if the current state is in `expected`.
+        Returns True when this caller performed the transition.
+        """
+        with self._locked() as seg:
+            seq, state, _, _ = _LAYOUT.unpack_from(seg, 0)
+            if state not in expected:
+                return False
+            struct.pack_into("<Q", seg, 0, seq + 1)
+            _LAYOUT.pack_into(seg, 0, seq + 1, new_state, opened_at, probe_started)
+            struct.pack_into("<Q", seg, 0, seq + 2)
+            self._transitions += 1
+            return True
+
+    # --------------------------------------------------------
+    # Rolling failure window (shared, in the segment)
+    # --------------------------------------------------------
+    def _record(self, failed):
+        now = int(time.time())
+        with self._locked() as seg:
+            offset = _LAYOUT.size + _BUCKET.size * (now % self.window_secs)
+            second, successes, failures = _BUCKET.unpack_from(seg, offset)
+            if second != now:
+                # The slot still holds a second that has left the window.
+                successes = failures = 0
+            if failed:
+                failures += 1
+            else:
+                successes += 1
+            _BUCKET.pack_into(seg, offset, now, successes, failures)
+            return self._window_totals(seg, now)
+
+    def _window_totals(self, seg, now):
+        # Caller holds the segment lock.
+        successes = failures = 0
+        for second, ok, failed in _BUCKET.iter_unpack(seg[_LAYOUT.size:self._size]):
+            if now - self.window_secs < second <= now:
+                successes += ok
+                failures += failed
+        return successes, failures
+
+    def _reset_window(self):
+        with self._locked() as seg:
+            seg[_LAYOUT.size:self._size] = bytes(self._size - _LAYOUT.size)
+
+    # --------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------
+    def allow_request(self):
+        """
+        True if the caller may contact the downstream service.
+        While OPEN, the first caller after `open_interval` claims the single
+        HALF_OPEN probe; everyone else keeps failing fast until it reports.
+        """
+        state, opened_at, probe_started = self._read()
+        if state == CLOSED:
+            return True
+        now = time.time()
+        if state == OPEN:
+            if now - opened_at < self.open_interval:
+                return False
+            return self._transition((OPEN,), HALF_OPEN, opened_at, probe_started=now)
+        # HALF_OPEN: only reclaim the probe if its owner went silent.
+        if now - probe_started < self.probe_timeout:
+            return False
+        return self._transition((HALF_OPEN,), HALF_OPEN, opened_at, probe_started=now)
+
+    def record_success(self):
+        self._record(failed=False)
+        if self._read()[0] != CLOSED and self._transition((HALF_OPEN,), CLOSED):
+            self._reset_window()
+
+    def record_failure(self):
+        successes, failures = self._record(failed=True)
+        state = self._read()[0]
+        if state == HALF_OPEN:
+            # Probe failed: back to OPEN for another full interval.
+            self._transition((HALF_OPEN,), OPEN, opened_at=time.time())
+            self._reset_window()
+        elif state == CLOSED:
+            calls = successes + failures
+            if calls >= self.minimum_calls and failures / calls >= self.failure_rate_threshold:
+                self._transition((CLOSED,), OPEN, opened_at=time.time())
+                self._reset_window()
+
+    def state(self):
+        return STATE_NAMES.get(self._read()[0], "closed")
+
+    def stats(self):
+        state, opened_at, _ = self._read()
+        with self._locked() as seg:
+            successes, failures = self._window_totals(seg, int(time.time()))
+        calls = successes + failures
+        return {
+            "state": STATE_NAMES.get(state, "closed"),
+            "opened_at": opened_at or None,
+            "window_calls": calls,
+            "window_failures": failures,
+            "failure_rate": round(failures / calls, 4) if calls else 0.0,
+            "transitions": self._transitions,
+            "segment": str(self.path),
+        }
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+from .models import Book
+
+# ------------------------------------------------------------
+# Streaming catalog export
+# ------------------------------------------------------------
+# The table is walked in keyset batches on the ISBN primary key
+# (WHERE ISBN > last ORDER BY ISBN LIMIT n) rather than with one big
+# QuerySet.iterator(): mysqlclient buffers a whole result set client-side,
+# so a single query would pull the full table into memory. Each batch is
+# encoded and yielded before the next one is read.
+#
+# Under ASGI, Django would drain a sync iterator into a list before sending
+# it, so streaming_content() hands it an async iterator that pulls one batch
+# at a time through sync_to_async.
+#
+# Prices are written exactly as stored ("12.50"), so an export can be fed
+# straight back into POST /books/_bulk.
+
+EXPORT_FIELDS = ("ISBN", "title", "Author", "description", "genre", "price", "quantity")
+EXPORT_BATCH_SIZE = 2000
+
+
+def iter_batches(batch_size=EXPORT_BATCH_SIZE):
+    last = None
+    while True:
+        qs = Book.objects.order_by("ISBN").values_list(*EXPORT_FIELDS)
+        if last is not None:
+            qs = qs.filter(ISBN__gt=last)
+        batch = list(qs[:batch_size])
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last = batch[-1][0]
+
+
+def ndjson_lines(batch_size=EXPORT_BATCH_SIZE):
+    for batch in iter_batches(batch_size):
+        yield "".join(
+            json.dumps(
+                {**dict(zip(EXPORT_FIELDS, row)), "price": str(row[5])},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ) + "\n"
+            for row in batch
+        )
+
+
+def csv_lines(batch_size=EXPORT_BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in iter_batches(batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def streaming_content(request, lines):
+    """Adapt the `lines` generator to the handler serving `request`."""
+    if not isinstance(request, ASGIRequest):
+        return lines
+
+    async def pull():
+        next_chunk = sync_to_async(next)
+        while True:
+            chunk = await next_chunk(lines, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    return pull()
@@ -0,0 +1,79 @@
+from django.db import connection, transaction
+
+from .models import Book
+
+# ------------------------------------------------------------
+# Contention-safe stock reservations
+# ------------------------------------------------------------
+# Stock is taken with one conditional UPDATE per ISBN:
+#
+#   UPDATE books_book SET quantity = quantity - n WHERE ISBN = x AND quantity >= n
+#
+# The row lock is held only for that statement, and two buyers can never both
+# take the last copy. No SELECT-then-save happens. The same statement also
+# reports the new level:
+#   MySQL   SET quantity = LAST_INSERT_ID(quantity - n); the value comes back
+#           in the OK packet as cursor.lastrowid
+#   others  UPDATE ... RETURNING quantity
+# Only a failed reservation costs a second query, to tell "unknown ISBN"
+# apart from "not enough stock".
+#
+# A reservation changes the representation, so it bumps `version` too.
+
+MAX_RESERVE_QUANTITY = 2147483647
+
+
+class ReservationError(Exception):
+    def __init__(self, isbn, available=None):
+        super().__init__(isbn)
+        self.isbn = isbn
+        self.available = available          # None: the ISBN does not exist
+
+
+def _take(cursor, isbn, n):
+    qn = connection.ops.quote_name
+    table, isbn_col, quantity, version = qn(Book._meta.db_table), qn("ISBN"), qn("quantity"), qn("version")
+    if connection.vendor == "mysql":
+        cursor.execute(
+            f"UPDATE {table} SET {quantity} = LAST_INSERT_ID({quantity} - %s), {version} = {version} + 1 "
+            f"WHERE {isbn_col} = %s AND {quantity} >= %s",
+            [n, isbn, n],
+        )
+        return cursor.lastrowid if cursor.rowcount == 1 else None
+    cursor.execute(
+        f"UPDATE {table} SET {quantity} = {quantity} - %s, {version} = {version} + 1 "
+        f"WHERE {isbn_col} = %s AND {quantity} >= %s RETURNING {quantity}",
+        [n, isbn, n],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _failure(isbn):
+    available = Book.objects.filter(ISBN=isbn).values_list("quantity", flat=True).first()
+    return ReservationError(isbn, available)
+
+
+def reserve(isbn, n):
+    """Take `n` copies of `isbn` in one statement; return the new quantity."""
+    with connection.cursor() as cursor:
+        level = _take(cursor, isbn, n)
+    if level is None:
+        raise _failure(isbn)
+    return level
+
+
+def reserve_many(quantities):
+    """
+    Take {isbn: n} copies all-or-nothing and return {isbn: new quantity}.
+    Rows are updated in ISBN order so concurrent batches cannot deadlock.
+    """
+    levels = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for isbn in sorted(quantities):
+            level = _take(cursor, isbn, quantities[isbn])
+            if level is None:
+                # Raising rolls back whatever this batch already took.
+                raise _failure(isbn)
+            levels[isbn] = level
+    return levels
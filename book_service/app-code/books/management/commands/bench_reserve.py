@@ -0,0 +1,103 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from books.inventory import ReservationError, reserve
+from books.models import Book
+
+# ------------------------------------------------------------
+# Reservation throughput on one hot ISBN
+# ------------------------------------------------------------
+#   python manage.py bench_reserve --threads 32 --reservations 200
+#   python manage.py bench_reserve --naive      # read-modify-write, for comparison
+#
+# Every thread reserves one copy at a time, as fast as it can, from a
+# single book stocked with fewer copies than the total demand. Afterwards the
+# stored quantity must equal stock minus the reservations that succeeded. The
+# naive mode (SELECT, then save()) shows lost updates and overselling.
+
+BENCH_ISBN = "bench-hot-isbn"
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent stock reservations against a single hot ISBN."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--reservations", type=int, default=200, help="attempts per thread")
+        parser.add_argument("--stock", type=int, default=None, help="default: 3/4 of the total demand")
+        parser.add_argument("--naive", action="store_true", help="use SELECT-then-save instead")
+        parser.add_argument("--isbn", default=BENCH_ISBN)
+
+    def handle(self, *args, **options):
+        threads, per_thread, isbn = options["threads"], options["reservations"], options["isbn"]
+        stock = options["stock"] if options["stock"] is not None else threads * per_thread * 3 // 4
+        Book.objects.update_or_create(
+            ISBN=isbn,
+            defaults={
+                "title": "Benchmark book", "Author": "Benchmark", "description": "bench_reserve",
+                "genre": "bench", "price": "1.00", "quantity": stock,
+            },
+        )
+        take = self._naive if options["naive"] else self._atomic
+        counts = {"ok": 0, "sold_out": 0, "errors": 0}
+        lock = threading.Lock()
+        start = threading.Barrier(threads + 1)
+
+        def worker():
+            local = {"ok": 0, "sold_out": 0, "errors": 0}
+            start.wait()
+            try:
+                for _ in range(per_thread):
+                    try:
+                        local["ok" if take(isbn) else "sold_out"] += 1
+                    except DatabaseError:
+                        local["errors"] += 1
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in local.items():
+                        counts[key] += value
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        final = Book.objects.get(ISBN=isbn).quantity
+        attempts = threads * per_thread
+        self.stdout.write(f"mode          {'naive read-modify-write' if options['naive'] else 'conditional UPDATE'}")
+        self.stdout.write(f"database      {connection.vendor}")
+        self.stdout.write(f"threads       {threads}")
+        self.stdout.write(f"attempts      {attempts} in {elapsed:.3f}s ({attempts / elapsed:,.0f}/s)")
+        self.stdout.write(f"reserved      {counts['ok']}  sold out: {counts['sold_out']}  db errors: {counts['errors']}")
+        self.stdout.write(f"stock         {stock} -> {final} (expected {stock - counts['ok']})")
+        if final == stock - counts["ok"] and final >= 0:
+            self.stdout.write(self.style.SUCCESS("consistent: no lost updates, no overselling"))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f"inconsistent: {stock - counts['ok'] - final:+d} copies unaccounted for"
+            ))
+
+    @staticmethod
+    def _atomic(isbn):
+        try:
+            reserve(isbn, 1)
+        except ReservationError:
+            return False
+        return True
+
+    @staticmethod
+    def _naive(isbn):
+        book = Book.objects.get(ISBN=isbn)
+        if book.quantity < 1:
+            return False
+        book.quantity -= 1
+        book.save()
+        return True
@@ -0,0 +1,83 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.settings import api_settings
+
+from books.models import Book
+from books.serializers import BOOK_READ_FIELDS, BookSerializer, book_representation
+
+# ------------------------------------------------------------
+# Read-path serialization cost: BookSerializer vs book_representation
+# ------------------------------------------------------------
+#   python manage.py bench_serializers --objects 500 --rounds 20
+#   python manage.py bench_serializers --from-db   # the first N stored books
+#
+# Both paths start from the same values_list() rows. The DRF path builds a
+# Book per row and runs BookSerializer(many=True), which is what the views
+# did before; the fast path calls book_representation(). Each round renders
+# the result with the configured renderer, and the two outputs must be
+# byte-identical or the command fails.
+
+
+def synthetic_rows(n):
+    return [
+        (
+            f"bench-{i:08d}",
+            Decimal(f"{i % 200}.{i % 100:02d}"),
+            f"Benchmark title {i}",
+            f"Author {i % 97}",
+            "A reasonably long description of the book, " * 4,
+            ("fiction", "non-fiction", "poetry")[i % 3],
+            i % 50,
+        )
+        for i in range(n)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare BookSerializer with the read fast path (cost per object, identical output)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=500)
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument("--from-db", action="store_true", help="serialize stored books instead of synthetic rows")
+
+    def handle(self, *args, **options):
+        n, rounds = options["objects"], options["rounds"]
+        if options["from_db"]:
+            rows = list(Book.objects.order_by("ISBN").values_list(*BOOK_READ_FIELDS)[:n])
+            if not rows:
+                raise CommandError("No books stored; drop --from-db to use synthetic rows.")
+        else:
+            rows = synthetic_rows(n)
+        # The renderer the API actually ships with (FastJSONRenderer).
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+        def drf():
+            books = [Book(**dict(zip(BOOK_READ_FIELDS, row))) for row in rows]
+            return renderer.render(BookSerializer(books, many=True).data)
+
+        def fast():
+            return renderer.render([book_representation(row) for row in rows])
+
+        if drf() != fast():
+            raise CommandError("Fast path output differs from BookSerializer.")
+
+        results = {name: self._time(path, rounds) for name, path in (("BookSerializer", drf), ("fast path", fast))}
+        for name, seconds in results.items():
+            self.stdout.write(f"{name:<16} {seconds / len(rows) * 1e6:8.2f} us/object")
+        self.stdout.write(
+            f"objects={len(rows)} rounds={rounds} output=identical "
+            f"speedup={results['BookSerializer'] / results['fast path']:.1f}x"
+        )
+
+    @staticmethod
+    def _time(path, rounds):
+        # Best of `rounds`: the least disturbed by GC and other processes.
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            path()
+            best = min(best, time.perf_counter() - started)
+        return best
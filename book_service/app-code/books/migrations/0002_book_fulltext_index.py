@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# FULLTEXT index backing GET /books/search on MySQL (see books/search.py).
+# Other databases have no FULLTEXT indexes; the service falls back to its
+# in-process search index there, so this migration does nothing on them.
+
+FULLTEXT_INDEX = "books_book_fulltext"
+FULLTEXT_COLUMNS = ("title", "Author", "description")
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    table = apps.get_model("books", "Book")._meta.db_table
+    columns = ", ".join(schema_editor.quote_name(column) for column in FULLTEXT_COLUMNS)
+    schema_editor.execute(
+        f"CREATE FULLTEXT INDEX {schema_editor.quote_name(FULLTEXT_INDEX)} "
+        f"ON {schema_editor.quote_name(table)} ({columns})"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    table = apps.get_model("books", "Book")._meta.db_table
+    schema_editor.execute(
+        f"DROP INDEX {schema_editor.quote_name(FULLTEXT_INDEX)} ON {schema_editor.quote_name(table)}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_book_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
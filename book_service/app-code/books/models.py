@@ -9,6 +9,8 @@ class Book(models.Model):
     genre = models.CharField(max_length=50)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.IntegerField()
+    # Bumped on every write; not part of the JSON representation, exposed as the ETag.
+    version = models.PositiveIntegerField(default=1)
     
     def __str__(self):
         return self.title
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------
+# Non-blocking client for the external recommendation service
+# ------------------------------------------------------------
+# Used by the async BookRelatedAPIView. Each event loop gets one pooled
+# httpx.AsyncClient, and concurrent requests for the same ISBN share a single
+# downstream call (singleflight): the first caller starts it, later callers
+# await the same task. The circuit breaker is consulted and updated once per
+# downstream call, not once per coalesced caller.
+#
+# Answers are kept in a RecommendationCache:
+#   fresh            -> served directly
+#   stale            -> served directly while one background refresh runs
+#   breaker open /
+#   downstream error -> the last-known-good answer is served instead of 503/504,
+#                       then the local similarity index (books/similar.py)
+#
+# mode = "fallback": ask the downstream, fall back as above (default)
+#        "local":    answer from the local index only, never call the downstream
+#        "remote":   ask the downstream, no local index fallback
+#
+# fetch() returns the (status, payload) pair the view should answer with;
+# payload is None for bodiless responses.
+
+
+class RecommendationCache:
+    """
+    Bounded LRU of downstream answers. Positive (200) and negative (204)
+    answers have separate TTLs; every answer stays usable as a stale copy for
+    `stale_secs` after it expires and as a last-known-good fallback for
+    `fallback_max_age` after it was fetched.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300, negative_ttl=60, stale_secs=60, fallback_max_age=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_secs = stale_secs
+        self.fallback_max_age = fallback_max_age
+        self._entries = OrderedDict()   # isbn -> (fetched_at, expires_at, status, payload)
+        self._lock = threading.Lock()
+
+    def get(self, isbn):
+        with self._lock:
+            entry = self._entries.get(isbn)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.fallback_max_age:
+                del self._entries[isbn]
+                return None
+            self._entries.move_to_end(isbn)
+            return entry
+
+    def put(self, isbn, status, payload):
+        now = time.monotonic()
+        ttl = self.ttl if status == 200 else self.negative_ttl
+        with self._lock:
+            self._entries[isbn] = (now, now + ttl, status, payload)
+            self._entries.move_to_end(isbn)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RelatedBooksClient:
+    def __init__(
+        self,
+        base_url,
+        breaker,
+        cache,
+        local_index=None,
+        mode="fallback",
+        timeout=3,
+        max_connections=50,
+        max_keepalive=10,
+    ):
+        self.base_url = base_url
+        self.breaker = breaker
+        self.cache = cache
+        self.local_index = local_index if mode != "remote" else None
+        self.mode = mode
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        )
+        # Keyed by event loop: an AsyncClient must not outlive or cross loops.
+        self._clients = weakref.WeakKeyDictionary()
+        self._inflight = weakref.WeakKeyDictionary()
+        self.stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "stale_hits": 0,
+            "fallbacks": 0,
+            "local_answers": 0,
+            "coalesced": 0,
+            "downstream_calls": 0,
+            "background_refreshes": 0,
+            "fast_failed": 0,
+        }
+
+    def start(self):
+        """Start building the local index, if any, so it is ready before it is needed."""
+        if self.local_index is not None:
+            self.local_index.build_in_background()
+
+    def _client(self, loop):
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=self.limits
+            )
+        return client
+
+    async def fetch(self, isbn):
+        self.stats["requests"] += 1
+        if self.mode == "local":
+            return await self._local(isbn, (204, None))
+
+        entry = self.cache.get(isbn)
+        if entry is not None:
+            fetched_at, expires_at, status, payload = entry
+            now = time.monotonic()
+            if now < expires_at:
+                self.stats["cache_hits"] += 1
+                return status, payload
+            if now < expires_at + self.cache.stale_secs:
+                # Stale-while-revalidate: answer now, refresh behind the caller.
+                self.stats["stale_hits"] += 1
+                if self._start_call(isbn, background=True) is not None:
+                    self.stats["background_refreshes"] += 1
+                return status, payload
+
+        task = self._start_call(isbn)
+        if task is None:
+            self.stats["fast_failed"] += 1
+            return await self._fallback(isbn, (503, {"message": "Circuit open — try later"}))
+        # shield: one cancelled caller must not cancel the call for the others.
+        status, payload = await asyncio.shield(task)
+        if status not in (200, 204):
+            return await self._fallback(isbn, (status, payload))
+        return status, payload
+
+    async def _fallback(self, isbn, failure):
+        """
+        Serve the last-known-good answer or, failing that, the local index's
+        answer instead of `failure`.
+        """
+        entry = self.cache.get(isbn)
+        if entry is None:
+            return await self._local(isbn, failure)
+        self.stats["fallbacks"] += 1
+        return entry[2], entry[3]
+
+    async def _local(self, isbn, otherwise):
+        if self.local_index is None:
+            return otherwise
+        if not self.local_index.ready:
+            # Never build on the request path: answer without the index until
+            # the background build (started at ASGI startup) is done.
+            self.local_index.build_in_background()
+            return otherwise
+        related = self.local_index.related(isbn)
+        if not related:
+            return otherwise
+        self.stats["local_answers"] += 1
+        return 200, related
+
+    def _start_call(self, isbn, background=False):
+        """
+        Return the in-flight downstream task for `isbn`, starting one if the
+        breaker allows it. Returns None when the breaker rejects the call.
+        """
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.setdefault(loop, {})
+
+        task = inflight.get(isbn)
+        if task is not None:
+            # Someone is already asking the downstream about this ISBN.
+            if not background:
+                self.stats["coalesced"] += 1
+            return None if background else task
+
+        if not self.breaker.allow_request():
+            return None
+
+        task = inflight[isbn] = loop.create_task(self._call(loop, isbn))
+
+        def done(task):
+            if inflight.get(isbn) is task:
+                del inflight[isbn]
+            # Background refreshes have no awaiting caller: retrieve (and log)
+            # their failure here, or it is lost with a "Task exception was
+            # never retrieved" warning.
+            if not task.cancelled() and task.exception() is not None:
+                logger.error("related-books call for %s failed", isbn, exc_info=task.exception())
+
+        task.add_done_callback(done)
+        return task
+
+    async def _call(self, loop, isbn):
+        self.stats["downstream_calls"] += 1
+        try:
+            response = await self._client(loop).get(f"/recommended-titles/isbn/{isbn}")
+        except httpx.TimeoutException:
+            # ---- TIMEOUT → count the failure & report 504 ----------------------------
+            self.breaker.record_failure()
+            return 504, {"message": "External service timeout"}
+        except httpx.HTTPError:
+            # ---- connection refused / reset → count the failure ----------------------
+            self.breaker.record_failure()
+            return 503, {"message": "External service unavailable"}
+
+        status = response.status_code
+        if status == 200:
+            # success path ⇒ a HALF_OPEN probe closes the circuit
+            try:
+                payload = response.json()
+            except ValueError:
+                self.breaker.record_failure()
+                return 503, {"message": "Invalid JSON from external service"}
+            self.breaker.record_success()
+            self.cache.put(isbn, 200, payload)
+            return 200, payload
+
+        if status in (204, 404):
+            # “no related books” –> 204 + EMPTY body
+            self.breaker.record_success()
+            self.cache.put(isbn, 204, None)
+            return 204, None
+
+        if status == 503:
+            # Downstream signals its own OPEN breaker – treat like a failure
+            self.breaker.record_failure()
+            return 503, {"message": "Circuit open (downstream unavailable)"}
+
+        # Any other code is an unexpected failure – treat like 500 for safety
+        self.breaker.record_failure()
+        return 503, {"message": f"Unexpected downstream status {status}"}
+
+    def snapshot(self):
+        return {**self.stats, "cached_answers": len(self.cache)}
@@ -0,0 +1,199 @@
+import heapq
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.db.models.expressions import RawSQL
+
+from .models import Book
+from .similar import tokenize
+
+# ------------------------------------------------------------
+# Full-text catalog search
+# ------------------------------------------------------------
+# Two interchangeable backends answer the same question: which books match
+# `query` (title, Author, description), best first, after the genre and
+# price filters.
+#
+#   fulltext_search()     MySQL: MATCH ... AGAINST on the FULLTEXT index added
+#                         by migration 0002, so the database never scans the
+#                         table with LIKE '%x%'.
+#   CatalogSearchIndex    everything else (SQLite/dev): an in-process inverted
+#                         index ranked with BM25. A query only visits the
+#                         posting lists of its own terms. Kept current on
+#                         create/update through upsert().
+#
+# Both return (total matches, [ISBN, ...] for the requested page); the view
+# turns the ISBNs into book representations.
+
+# MATCH must name exactly the columns of the FULLTEXT index (migration 0002).
+FULLTEXT_MATCH = "MATCH (`title`, `Author`, `description`) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+
+# Field weights: a word in the title says more than one in the description.
+TITLE_WEIGHT = 3
+AUTHOR_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# BM25 parameters (the usual defaults).
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def fulltext_search(query, genre=None, min_price=None, max_price=None, offset=0, limit=20):
+    books = _filtered(
+        Book.objects.annotate(relevance=RawSQL(FULLTEXT_MATCH, [query])).filter(relevance__gt=0),
+        genre, min_price, max_price,
+    )
+    total = books.count()
+    isbns = list(books.order_by("-relevance", "ISBN").values_list("ISBN", flat=True)[offset:offset + limit])
+    return total, isbns
+
+
+def _filtered(books, genre, min_price, max_price):
+    if genre:
+        books = books.filter(genre=genre)
+    if min_price is not None:
+        books = books.filter(price__gte=min_price)
+    if max_price is not None:
+        books = books.filter(price__lte=max_price)
+    return books
+
+
+def search_terms(title, author, description):
+    terms = Counter()
+    for tokens, weight in (
+        (tokenize(title), TITLE_WEIGHT),
+        (tokenize(author), AUTHOR_WEIGHT),
+        (tokenize(description), DESCRIPTION_WEIGHT),
+    ):
+        for tok in tokens:
+            terms[tok] += weight
+    return terms
+
+
+class CatalogSearchIndex:
+    FIELDS = ("ISBN", "title", "Author", "description", "genre", "price")
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._reset()
+        self.stats = {"builds": 0, "upserts": 0, "queries": 0, "build_seconds": 0.0}
+
+    def _reset(self):
+        self.postings = {}                              # term -> {isbn: weighted tf}
+        self.docs = {}                                  # isbn -> (length, genre, price, terms)
+        self.total_length = 0
+
+    @property
+    def ready(self):
+        return self._built
+
+    # --------------------------------------------------------
+    # Building and maintenance
+    # --------------------------------------------------------
+    def build(self, rows=None):
+        """
+        (Re)build from `rows` of (ISBN, title, Author, description, genre,
+        price); defaults to reading the whole Book table.
+        """
+        if rows is None:
+            rows = Book.objects.values_list(*self.FIELDS).iterator(chunk_size=2000)
+        started = time.perf_counter()
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(*row)
+            self._built = True
+        self.stats["builds"] += 1
+        self.stats["build_seconds"] = round(time.perf_counter() - started, 4)
+
+    def reset(self):
+        """Drop the index (e.g. after a bulk import); it is rebuilt on next use."""
+        with self._lock:
+            self._built = False
+            self._reset()
+
+    def ensure_built(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self.build()
+
+    def upsert(self, isbn, title, author, description, genre, price):
+        """Add or re-index one book. A no-op until the index has been built."""
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(isbn)
+            self._add(isbn, title, author, description, genre, price)
+            self.stats["upserts"] += 1
+
+    def _add(self, isbn, title, author, description, genre, price):
+        terms = search_terms(title, author, description)
+        length = sum(terms.values())
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[isbn] = tf
+        self.docs[isbn] = (length, (genre or "").lower(), price, tuple(terms))
+        self.total_length += length
+
+    def _remove(self, isbn):
+        doc = self.docs.pop(isbn, None)
+        if doc is None:
+            return
+        length, _, _, terms = doc
+        self.total_length -= length
+        for term in terms:
+            postings = self.postings[term]
+            del postings[isbn]
+            if not postings:
+                del self.postings[term]
+
+    # --------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------
+    def search(self, query, genre=None, min_price=None, max_price=None, offset=0, limit=20):
+        self.stats["queries"] += 1
+        terms = set(tokenize(query))
+        genre = genre.lower() if genre else None
+        with self._lock:
+            n_docs = len(self.docs)
+            if not terms or not n_docs:
+                return 0, []
+            avg_length = self.total_length / n_docs or 1
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for isbn, tf in postings.items():
+                    norm = 1 - BM25_B + BM25_B * self.docs[isbn][0] / avg_length
+                    scores[isbn] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+            matches = [
+                (-score, isbn) for isbn, score in scores.items()
+                if self._keep(self.docs[isbn], genre, min_price, max_price)
+            ]
+        # Only the requested page is sorted, not every match.
+        page = heapq.nsmallest(offset + limit, matches)[offset:]
+        return len(matches), [isbn for _, isbn in page]
+
+    @staticmethod
+    def _keep(doc, genre, min_price, max_price):
+        _, doc_genre, price, _ = doc
+        if genre is not None and doc_genre != genre:
+            return False
+        if min_price is not None and price < min_price:
+            return False
+        if max_price is not None and price > max_price:
+            return False
+        return True
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "ready": self._built,
+            "books": len(self.docs),
+            "terms": len(self.postings),
+        }
@@ -3,11 +3,15 @@ from rest_framework import serializers
 import re
 from .models import Book
 
+# Shared with the lightweight bulk-import validator (books/bulk.py).
+PRICE_RE = re.compile(r'^\d+\.\d{2}$')
+PRICE_ERROR = "Price must be positive and have exactly 2 decimal places."
+
 class ExactTwoDecimalField(serializers.DecimalField):
     def to_internal_value(self, data):
         # Raw string check before coercing to Decimal
-        if not re.match(r'^\d+\.\d{2}$', str(data)):
-            raise serializers.ValidationError("Price must be positive and have exactly 2 decimal places.")
+        if not PRICE_RE.match(str(data)):
+            raise serializers.ValidationError(PRICE_ERROR)
         
         try:
             value = super().to_internal_value(data)
@@ -21,11 +25,72 @@ class BookSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Book
-        fields = '__all__'
+        # `version` is bookkeeping for If-Match/ETags, not part of the book.
+        exclude = ['version']
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Convert price from string to float (optional)
         if 'price' in data:
             data['price'] = float(data['price'])
-        return data
\ No newline at end of file
+        return data
+
+# ------------------------------------------------------------
+# Read fast path
+# ------------------------------------------------------------
+# Builds the same dict as BookSerializer(book).data straight from a
+# values_list() row, skipping model instantiation, per-field
+# to_representation() calls and the Decimal -> str -> float round trip.
+# Rendered with the same renderer, the JSON is byte-identical (checked by
+# `manage.py bench_serializers`).
+#
+# BOOK_READ_FIELDS is BookSerializer's output order; keep both in step.
+# price is DECIMAL(10, 2), so the stored value already has the two places
+# DecimalField would quantize to and float() of it is the same double.
+BOOK_READ_FIELDS = ("ISBN", "price", "title", "Author", "description", "genre", "quantity")
+
+
+def book_representation(row):
+    """BookSerializer(book).data for a BOOK_READ_FIELDS row."""
+    isbn, price, title, author, description, genre, quantity = row
+    return {
+        "ISBN": isbn,
+        "price": float(price),
+        "title": title,
+        "Author": author,
+        "description": description,
+        "genre": genre,
+        "quantity": quantity,
+    }
+
+
+# ------------------------------------------------------------
+# Field projection (?fields=ISBN,title,price)
+# ------------------------------------------------------------
+def read_fields(value):
+    """
+    The BOOK_READ_FIELDS named by a ?fields= value, in output order, or None
+    when the parameter is absent or names every field. Raises ValueError on
+    an empty list or an unknown name.
+    """
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    if not names or not names <= set(BOOK_READ_FIELDS):
+        raise ValueError(value)
+    if len(names) == len(BOOK_READ_FIELDS):
+        return None
+    return tuple(name for name in BOOK_READ_FIELDS if name in names)
+
+
+def book_projection(row, fields):
+    """book_representation() of a values_list(*fields) row."""
+    data = dict(zip(fields, row))
+    if "price" in data:
+        data["price"] = float(data["price"])
+    return data
+
+
+def project(data, fields):
+    """Narrow a full representation to `fields` (None keeps everything)."""
+    return data if fields is None else {name: data[name] for name in fields}
@@ -0,0 +1,325 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------
+# Local "related books" engine
+# ------------------------------------------------------------
+# A TF-IDF nearest-neighbour index over the Book catalog, used when the
+# external recommendation service is unreachable (or instead of it, see
+# RELATED_BOOKS_MODE in views.py). No network access is needed.
+#
+#   build()   vectorizes every book (title, Author, genre, description) into an
+#             L2-normalized float32 CSR matrix and precomputes the top-k cosine
+#             neighbours of every row with chunked sparse products, so the work
+#             is proportional to the pairs of books that share a term rather
+#             than to n² · features.
+#   related() is a dictionary lookup into the precomputed neighbours.
+#   upsert()  re-vectorizes one book with the current vocabulary/IDF, does a
+#             single sparse matrix-vector product against the catalog and
+#             patches the neighbour lists it affects. After `rebuild_after`
+#             upserts a full rebuild is started so IDF weights and vocabulary
+#             catch up.
+#
+# Full builds never run on the request path: build_in_background() runs them
+# on a daemon thread (at ASGI startup, after reset() and for the periodic
+# rebuild) and swaps the result in when it is complete. Until the first build
+# is done, related() is empty and callers fall back to their other answers.
+# An upsert that lands while a rebuild reads the catalog may be lost until the
+# next rebuild.
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+# Field weights: a shared author or genre says more than a shared description word.
+TITLE_WEIGHT = 2
+AUTHOR_WEIGHT = 3
+GENRE_WEIGHT = 2
+
+
+def tokenize(text):
+    """Lower-cased alphanumeric tokens without stopwords or 1-char noise."""
+    return [tok for tok in TOKEN_RE.findall(text.lower()) if len(tok) > 1 and tok not in STOPWORDS]
+
+
+def book_terms(title, author, genre, description):
+    terms = Counter()
+    for tok in tokenize(title):
+        terms[tok] += TITLE_WEIGHT
+    for tok in tokenize(author):
+        terms["author:" + tok] += AUTHOR_WEIGHT
+    if genre:
+        terms["genre:" + genre.strip().lower()] += GENRE_WEIGHT
+    terms.update(tokenize(description))
+    return terms
+
+
+class SimilarBooksIndex:
+    FIELDS = ("ISBN", "title", "Author", "genre", "description")
+
+    def __init__(self, neighbours=10, max_features=4096, rebuild_after=500):
+        self.k = neighbours
+        self.max_features = max_features
+        self.rebuild_after = rebuild_after
+        self._lock = threading.RLock()
+        self._built = False
+        self._building = False
+        self._reset()
+        self.stats = {"builds": 0, "upserts": 0, "lookups": 0, "build_seconds": 0.0}
+
+    def _reset(self):
+        self.rows = {}                                  # isbn -> row number
+        self.meta = []                                  # row -> (isbn, title, Author)
+        self.terms = []                                 # row -> Counter of weighted terms
+        self.vocab = {}                                 # term -> column
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.nbr_idx = np.zeros((0, self.k), dtype=np.int32)
+        self.nbr_score = np.zeros((0, self.k), dtype=np.float32)
+        self._pending = 0
+
+    @property
+    def ready(self):
+        return self._built
+
+    # --------------------------------------------------------
+    # Building
+    # --------------------------------------------------------
+    def build(self, rows=None):
+        """
+        (Re)build from `rows` of (ISBN, title, Author, genre, description);
+        defaults to reading the whole Book table.
+        """
+        if rows is None:
+            from .models import Book
+            rows = Book.objects.values_list(*self.FIELDS).iterator(chunk_size=2000)
+        started = time.perf_counter()
+        meta, terms = [], []
+        for isbn, title, author, genre, description in rows:
+            meta.append((isbn, title, author))
+            terms.append(book_terms(title, author, genre, description))
+        # The heavy part runs without the lock, so upserts and lookups carry
+        # on against the current index until the new one is swapped in.
+        vocab, idf = self._fit_vocabulary(terms)
+        matrix = self._vectorize_all(terms, vocab, idf)
+        nbr_idx, nbr_score = self._compute_neighbours(matrix)
+        with self._lock:
+            self._reset()
+            self.meta = meta
+            self.terms = terms
+            self.vocab, self.idf, self.matrix = vocab, idf, matrix
+            self.nbr_idx, self.nbr_score = nbr_idx, nbr_score
+            self.rows = {m[0]: i for i, m in enumerate(meta)}
+            self._built = True
+        self.stats["builds"] += 1
+        self.stats["build_seconds"] = round(time.perf_counter() - started, 4)
+
+    def build_in_background(self):
+        """Start build() on a daemon thread unless one is already running."""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._background_build, name="similar-books-build", daemon=True).start()
+
+    def _background_build(self):
+        from django.db import connection
+
+        try:
+            self.build()
+        except Exception:
+            logger.exception("building the related-books index failed")
+        finally:
+            self._building = False
+            connection.close()
+
+    def reset(self):
+        """Drop the index (e.g. after a bulk import); the next lookup starts a rebuild."""
+        with self._lock:
+            self._built = False
+            self._reset()
+
+    def _fit_vocabulary(self, terms):
+        df = Counter()
+        for counts in terms:
+            df.update(counts.keys())
+        # A term seen in a single book cannot link two books together.
+        shared = [term for term, n in df.items() if n > 1]
+        shared.sort(key=lambda term: -df[term])
+        shared = shared[: self.max_features]
+        vocab = {term: col for col, term in enumerate(shared)}
+        n_docs = max(len(terms), 1)
+        counts = np.array([df[term] for term in shared], dtype=np.float32)
+        return vocab, (np.log((1 + n_docs) / (1 + counts)) + 1).astype(np.float32)
+
+    @staticmethod
+    def _vector_entries(counts, vocab, idf):
+        """(columns, L2-normalized weights) of one book's sparse TF-IDF vector."""
+        cols = [vocab[term] for term in counts if term in vocab]
+        tf = [counts[term] for term in counts if term in vocab]
+        cols = np.array(cols, dtype=np.int32)
+        values = (1 + np.log(np.array(tf, dtype=np.float32))) * idf[cols]     # sublinear tf
+        norm = np.linalg.norm(values)
+        return cols, values / norm if norm else values
+
+    def _vectorize(self, counts):
+        cols, values = self._vector_entries(counts, self.vocab, self.idf)
+        return sparse.csr_matrix(
+            (values, cols, [0, len(cols)]), shape=(1, len(self.vocab)), dtype=np.float32
+        )
+
+    def _vectorize_all(self, terms, vocab, idf):
+        indptr, indices, data = [0], [], []
+        for counts in terms:
+            cols, values = self._vector_entries(counts, vocab, idf)
+            indices.append(cols)
+            data.append(values)
+            indptr.append(indptr[-1] + len(cols))
+        return sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+                np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32),
+                np.array(indptr, dtype=np.int64),
+            ),
+            shape=(len(terms), len(vocab)),
+            dtype=np.float32,
+        )
+
+    def _compute_neighbours(self, matrix):
+        n = matrix.shape[0]
+        k = min(self.k, max(n - 1, 0))
+        nbr_idx = np.full((n, self.k), -1, dtype=np.int32)
+        nbr_score = np.full((n, self.k), -1.0, dtype=np.float32)
+        if k == 0:
+            return nbr_idx, nbr_score
+        transposed = matrix.T.tocsr()
+        # A block of rows holds at most ~16M similarities regardless of catalog size.
+        chunk = max(1, (1 << 24) // n)
+        for start in range(0, n, chunk):
+            # Only pairs that share a term are computed and stored.
+            sims = (matrix[start:start + chunk] @ transposed).tocsr()
+            rows = np.repeat(np.arange(sims.shape[0]), np.diff(sims.indptr))
+            cols, scores = sims.indices, sims.data
+            keep = (cols != rows + start) & (scores > 0)   # a book is not related to itself
+            rows, cols, scores = rows[keep], cols[keep], scores[keep]
+            # Best first within each row, then the first k of every row.
+            order = np.lexsort((-scores, rows))
+            rows, cols, scores = rows[order], cols[order], scores[order]
+            rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+            top = rank < k
+            nbr_idx[rows[top] + start, rank[top]] = cols[top]
+            nbr_score[rows[top] + start, rank[top]] = scores[top]
+        return nbr_idx, nbr_score
+
+    # --------------------------------------------------------
+    # Incremental maintenance
+    # --------------------------------------------------------
+    def upsert(self, isbn, title, author, genre, description):
+        """Add or re-index one book. A no-op until the index has been built."""
+        if not self._built:
+            return
+        with self._lock:
+            counts = book_terms(title, author, genre, description)
+            vector = self._vectorize(counts)
+            i = self.rows.get(isbn)
+            if i is None:
+                self.matrix = sparse.vstack([self.matrix, vector], format="csr")
+                i = self._append(isbn, title, author, counts)
+            else:
+                self.meta[i] = (isbn, title, author)
+                self.terms[i] = counts
+                self.matrix = sparse.vstack([self.matrix[:i], vector, self.matrix[i + 1:]], format="csr")
+            self._patch_neighbours(i, vector)
+            self._pending += 1
+            self.stats["upserts"] += 1
+        if self._pending >= self.rebuild_after:
+            self.build_in_background()
+
+    def _append(self, isbn, title, author, counts):
+        i = len(self.meta)
+        if i == self.nbr_idx.shape[0]:
+            # Grow capacity by half so appends stay amortized O(row).
+            extra = max(16, i // 2)
+            self.nbr_idx = np.vstack([self.nbr_idx, np.full((extra, self.k), -1, dtype=np.int32)])
+            self.nbr_score = np.vstack([self.nbr_score, np.full((extra, self.k), -1.0, dtype=np.float32)])
+        self.terms.append(counts)
+        self.meta.append((isbn, title, author))
+        # Publish the row number last: readers only look up rows they can index.
+        self.rows[isbn] = i
+        return i
+
+    def _patch_neighbours(self, i, vector):
+        n = len(self.meta)
+        nbr_idx, nbr_score = self.nbr_idx[:n], self.nbr_score[:n]
+        sims = (self.matrix @ vector.T).toarray().ravel()
+        sims[i] = -1.0
+        k = min(self.k, n - 1)
+
+        # The book's own list.
+        nbr_idx[i] = -1
+        nbr_score[i] = -1.0
+        if k > 0:
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            nbr_idx[i, :k] = top
+            nbr_score[i, :k] = sims[top]
+
+        # Lists that already contain the book get its new score; lists whose
+        # weakest entry it now beats take it in. Only those rows are re-sorted.
+        contains = nbr_idx == i
+        holders = contains.any(axis=1)
+        nbr_score[contains] = sims[np.nonzero(contains)[0]]
+        beats = ~holders & (sims > nbr_score[:, -1])
+        beats[i] = False
+        nbr_idx[beats, -1] = i
+        nbr_score[beats, -1] = sims[beats]
+        touched = np.nonzero(holders | beats)[0]
+        if len(touched):
+            order = np.argsort(-nbr_score[touched], axis=1)
+            nbr_idx[touched] = np.take_along_axis(nbr_idx[touched], order, axis=1)
+            nbr_score[touched] = np.take_along_axis(nbr_score[touched], order, axis=1)
+
+    # --------------------------------------------------------
+    # Lookups
+    # --------------------------------------------------------
+    def related(self, isbn, limit=None):
+        """
+        Most similar books to `isbn` as [{"ISBN", "title", "Author"}, ...];
+        empty when the book is unknown or shares nothing with the catalog.
+        """
+        self.stats["lookups"] += 1
+        # Take local references: a concurrent rebuild swaps these wholesale.
+        i, meta, nbr_idx, nbr_score = self.rows.get(isbn), self.meta, self.nbr_idx, self.nbr_score
+        if i is None or i >= len(nbr_idx):
+            return []
+        idx, scores = nbr_idx[i], nbr_score[i]
+        result = []
+        for j, score in zip(idx[: limit or self.k], scores[: limit or self.k]):
+            if j < 0 or score <= 0 or j >= len(meta):
+                break
+            isbn_j, title, author = meta[j]
+            result.append({"ISBN": isbn_j, "title": title, "Author": author})
+        return result
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "ready": self._built,
+            "building": self._building,
+            "books": len(self.meta),
+            "features": len(self.vocab),
+            "pending_changes": self._pending,
+            "matrix_bytes": int(
+                self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes
+                + self.nbr_idx.nbytes + self.nbr_score.nbytes
+            ),
+        }
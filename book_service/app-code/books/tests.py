@@ -0,0 +1,241 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .bulk import import_books, iter_rows
+from .cache import BookCache, CachedBook, book_cache
+from .circuit import CircuitBreaker
+from .models import Book
+from .similar import SimilarBooksIndex
+
+SHARED_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "books": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "books-tests"},
+}
+
+
+def book_payload(ISBN="978-0321815736", **overrides):
+    return {
+        "ISBN": ISBN,
+        "title": "Software Architecture in Practice",
+        "Author": "Bass, L.",
+        "description": "seminal book on software architecture",
+        "genre": "non-fiction",
+        "price": "59.95",
+        "quantity": 106,
+        **overrides,
+    }
+
+
+def create_book(**overrides):
+    return Book.objects.create(**book_payload(**overrides))
+
+
+class BookCacheInvalidationTests(TestCase):
+    def setUp(self):
+        book_cache.clear()
+        self.client = APIClient()
+        self.isbn = create_book().ISBN
+        # Warm the cache, so a stale entry would be what the next GET serves.
+        self.assertEqual(self.client.get(f"/books/{self.isbn}").json()["quantity"], 106)
+
+    def test_put_replaces_the_cached_copy(self):
+        response = self.client.put(f"/books/{self.isbn}", book_payload(price="12.34"), format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f"/books/{self.isbn}").json()["price"], 12.34)
+
+    def test_patch_replaces_the_cached_copy(self):
+        response = self.client.patch(f"/books/{self.isbn}", {"quantity": 7}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f"/books/{self.isbn}").json()["quantity"], 7)
+
+    def test_reserve_drops_the_cached_copy(self):
+        response = self.client.post(f"/books/{self.isbn}/reserve", {"quantity": 6}, format="json")
+        self.assertEqual(response.json(), {"ISBN": self.isbn, "quantity": 100})
+        self.assertEqual(self.client.get(f"/books/{self.isbn}").json()["quantity"], 100)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class BookCacheRaceTests(TestCase):
+    def setUp(self):
+        caches["books"].clear()
+
+    def test_write_during_a_load_keeps_the_local_copy_out(self):
+        cache = BookCache(max_entries=100, local_ttl=60)
+
+        def stale_loader():
+            # Another request writes the book while this load is in flight.
+            cache.refresh("1", {"quantity": 2}, 2)
+            return CachedBook({"quantity": 1}, 1)
+
+        cache.load("1", stale_loader)
+        self.assertEqual(cache.get("1"), CachedBook({"quantity": 2}, 2))
+
+    def test_stale_load_never_overwrites_a_newer_shared_entry(self):
+        writer = BookCache(max_entries=100, local_ttl=60, shared_alias="books")
+        reader = BookCache(max_entries=100, local_ttl=60, shared_alias="books")
+        writer.refresh("1", {"quantity": 2}, 2)
+        # Another worker's load read the row before that write and lands after it.
+        reader.load("1", lambda: CachedBook({"quantity": 1}, 1))
+        self.assertEqual(writer.shared.get("book:1"), CachedBook({"quantity": 2}, 2))
+
+    def test_invalidate_leaves_a_tombstone_that_refuses_older_loads(self):
+        create_book(ISBN="1", version=3)
+        cache = BookCache(max_entries=100, local_ttl=60, shared_alias="books")
+        cache.invalidate("1")
+        cache.load("1", lambda: CachedBook({"quantity": 1}, 2))
+        cache.clear()
+        self.assertIsNone(cache.get("1"))
+        cache.load("1", lambda: CachedBook({"quantity": 1}, 3))
+        self.assertEqual(cache.shared.get("book:1"), CachedBook({"quantity": 1}, 3))
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        book_cache.clear()
+        self.client = APIClient()
+        self.isbn = create_book().ISBN
+        self.etag = self.client.get(f"/books/{self.isbn}")["ETag"]
+
+    def test_matching_if_none_match_is_304(self):
+        response = self.client.get(f"/books/{self.isbn}", HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], self.etag)
+
+    def test_if_none_match_on_a_cache_miss_is_one_query(self):
+        book_cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/books/{self.isbn}", HTTP_IF_NONE_MATCH=f"W/{self.etag}")
+        self.assertEqual(response.status_code, 304)
+
+    def test_changed_book_is_200_with_a_new_etag(self):
+        self.client.patch(f"/books/{self.isbn}", {"quantity": 7}, format="json")
+        response = self.client.get(f"/books/{self.isbn}", HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], self.etag)
+
+    def test_stale_if_match_is_412(self):
+        self.client.patch(f"/books/{self.isbn}", {"quantity": 7}, format="json")
+        response = self.client.patch(f"/books/{self.isbn}", {"quantity": 8}, format="json", HTTP_IF_MATCH=self.etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Book.objects.get(ISBN=self.isbn).quantity, 7)
+
+    def test_current_if_match_applies(self):
+        response = self.client.put(
+            f"/books/{self.isbn}", book_payload(quantity=5), format="json", HTTP_IF_MATCH=self.etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], self.etag)
+
+
+class BatchReserveTests(TestCase):
+    def setUp(self):
+        book_cache.clear()
+        create_book(ISBN="a", quantity=5)
+        create_book(ISBN="b", quantity=1)
+
+    def reserve(self, items):
+        return APIClient().post("/books/_reserve", {"items": items}, format="json")
+
+    def test_reserves_every_item(self):
+        response = self.reserve([{"ISBN": "a", "quantity": 2}, {"ISBN": "b", "quantity": 1}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"], [{"ISBN": "a", "quantity": 3}, {"ISBN": "b", "quantity": 0}])
+
+    def test_short_item_reserves_nothing(self):
+        response = self.reserve([{"ISBN": "a", "quantity": 2}, {"ISBN": "b", "quantity": 2}])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {"message": "Insufficient stock", "ISBN": "b", "available": 1})
+        self.assertEqual(dict(Book.objects.values_list("ISBN", "quantity")), {"a": 5, "b": 1})
+
+    def test_unknown_item_reserves_nothing(self):
+        response = self.reserve([{"ISBN": "a", "quantity": 2}, {"ISBN": "zz", "quantity": 1}])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Book.objects.get(ISBN="a").quantity, 5)
+
+
+class BulkImportTests(TestCase):
+    def ndjson(self, *rows):
+        return iter_rows([(json.dumps(row) if isinstance(row, dict) else row).encode() for row in rows], "application/x-ndjson")
+
+    def test_insert_report_counts(self):
+        create_book(ISBN="taken")
+        report = import_books(
+            self.ndjson(
+                book_payload(ISBN="1"),
+                book_payload(ISBN="2"),
+                book_payload(ISBN="1"),             # repeated in the upload
+                book_payload(ISBN="taken"),         # already in the catalog
+                book_payload(ISBN="3", price="1"),  # invalid price
+                "{not json",
+            ),
+            chunk_size=2,
+        ).as_dict()
+        self.assertEqual((report["received"], report["created"], report["updated"], report["failed"]), (6, 2, 0, 4))
+        self.assertEqual(sorted(error["row"] for error in report["errors"]), [3, 4, 5, 6])
+        self.assertEqual(Book.objects.count(), 3)
+
+    def test_upsert_report_counts(self):
+        create_book(ISBN="old", quantity=1, version=4)
+        report = import_books(
+            self.ndjson(book_payload(ISBN="old", quantity=9), book_payload(ISBN="new")),
+            upsert=True,
+        ).as_dict()
+        self.assertEqual((report["received"], report["created"], report["updated"], report["failed"]), (2, 1, 1, 0))
+        self.assertEqual(Book.objects.get(ISBN="old").quantity, 9)
+        self.assertEqual(Book.objects.get(ISBN="old").version, 5)
+
+    def test_upsert_counts_a_repeated_isbn_as_updated(self):
+        report = import_books(
+            self.ndjson(book_payload(ISBN="1", quantity=1), book_payload(ISBN="1", quantity=2), book_payload(ISBN="2")),
+            upsert=True,
+        ).as_dict()
+        self.assertEqual((report["received"], report["created"], report["updated"], report["failed"]), (3, 2, 1, 0))
+        self.assertEqual(Book.objects.get(ISBN="1").quantity, 2)
+
+    def test_on_chunk_sees_every_committed_chunk(self):
+        chunks = []
+        import_books(self.ndjson(*(book_payload(ISBN=str(n)) for n in range(5))), chunk_size=2, on_chunk=chunks.append)
+        self.assertEqual(chunks, [["0", "1"], ["2", "3"], ["4"]])
+
+
+class SimilarBooksIndexTests(TestCase):
+    ROWS = [
+        ("1", "Distributed Systems", "Tanenbaum, A.", "non-fiction", "consensus replication and fault tolerance"),
+        ("2", "Designing Distributed Systems", "Burns, B.", "non-fiction", "patterns for replication and consensus"),
+        ("3", "The Hobbit", "Tolkien, J.", "fiction", "a hobbit goes on an adventure with dwarves"),
+        ("4", "The Silmarillion", "Tolkien, J.", "fiction", "the elder days of middle earth"),
+    ]
+
+    def test_neighbours_share_terms(self):
+        index = SimilarBooksIndex(neighbours=2)
+        index.build(self.ROWS)
+        self.assertEqual([book["ISBN"] for book in index.related("1")], ["2"])
+        self.assertEqual([book["ISBN"] for book in index.related("4")], ["3"])
+
+    def test_upsert_links_a_new_book(self):
+        index = SimilarBooksIndex(neighbours=2)
+        index.build(self.ROWS)
+        index.upsert("5", "Unfinished Tales", "Tolkien, J.", "fiction", "middle earth stories")
+        self.assertEqual(index.related("5")[0]["ISBN"], "4")
+        self.assertIn("5", [book["ISBN"] for book in index.related("4")])
+
+
+class CircuitBreakerTests(TestCase):
+    def test_workers_share_the_failure_window(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "circuit"
+            # Two breakers on one segment stand in for two worker processes.
+            one, two = (CircuitBreaker(path, minimum_calls=4, failure_rate_threshold=0.5) for _ in range(2))
+            one.record_success()
+            one.record_failure()
+            two.record_failure()
+            self.assertEqual(two.stats()["window_calls"], 3)
+            self.assertEqual(one.state(), "closed")
+            two.record_failure()
+            self.assertEqual((one.state(), one.allow_request()), ("open", False))
+            self.assertEqual(one.stats()["window_calls"], 0)
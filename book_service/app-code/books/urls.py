@@ -1,12 +1,20 @@
 from django.urls import path
-from .views import BookCreateAPIView, BookDetailAPIView, BookRelatedAPIView, StatusAPIView
+from .views import BookAutocompleteAPIView, BookBatchAPIView, BookBatchReserveAPIView, BookBulkImportAPIView, BookCreateAPIView, BookDetailAPIView, BookExportView, BookRelatedAPIView, BookReserveAPIView, BookSearchAPIView, StatsAPIView, StatusAPIView
 
 urlpatterns = [
     # Monitoring endpoint
     path('status', StatusAPIView.as_view(), name='status'),
+    path('_stats', StatsAPIView.as_view(), name='stats'),
     # Book endpoints:
     path('', BookCreateAPIView.as_view(), name='add_book'),
+    path('_batch', BookBatchAPIView.as_view(), name='batch_books'),
+    path('_reserve', BookBatchReserveAPIView.as_view(), name='reserve_books'),
+    path('_bulk', BookBulkImportAPIView.as_view(), name='bulk_import_books'),
+    path('autocomplete', BookAutocompleteAPIView.as_view(), name='autocomplete_books'),
+    path('search', BookSearchAPIView.as_view(), name='search_books'),
+    path('export', BookExportView.as_view(), name='export_books'),
     path('<str:isbn>', BookDetailAPIView.as_view(), name='book_detail'),
+    path('<str:isbn>/reserve', BookReserveAPIView.as_view(), name='reserve_book'),
     path('<str:isbn>/related-books', BookRelatedAPIView.as_view(), name='book_detail_alt'),
     path('isbn/<str:isbn>', BookDetailAPIView.as_view(), name='book_detail_alt'),
 ]
\ No newline at end of file
@@ -1,22 +1,211 @@
-import json
-import os
-import time
+import tempfile
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
 
-import requests
-from django.http import HttpResponse
+from django.db import connection
+from django.db.models import F
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView             # Base class for our API views
 from rest_framework.response import Response         # DRF Response for returning data in JSON format
 from rest_framework import status                   # Provides HTTP status code constants (optional use)
 from django.shortcuts import get_object_or_404       # Helper to retrieve an object or return 404 if not found
 from django.urls import reverse                      # Used to build URLs dynamically based on view names
 from .models import Book                  # Import our database models (Book)
-from .serializers import BookSerializer  # Import serializers for data validation and transformation
+from .serializers import BOOK_READ_FIELDS, BookSerializer, book_projection, book_representation, project, read_fields  # Import serializers for data validation and transformation
+from .cache import CachedBook, book_cache  # Read-through cache for serialized books
+from .circuit import CircuitBreaker       # Shared-memory circuit breaker for the recommendation service
+from .related import RecommendationCache, RelatedBooksClient  # Async, coalescing client for the recommendation service
+from .similar import SimilarBooksIndex    # Local TF-IDF related-books index
+from .bulk import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, UnsupportedFormat, import_books, iter_rows
+from .export import csv_lines, ndjson_lines, streaming_content
+from .search import CatalogSearchIndex, fulltext_search  # Catalog search backends
+from .autocomplete import PrefixIndex     # In-memory type-ahead index
+from .inventory import MAX_RESERVE_QUANTITY, ReservationError, reserve, reserve_many
+
+# Book listing (GET /books/): keyset pagination on the ISBN primary key.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Batch lookup (GET /books/?isbn=a,b,c and POST /books/_batch).
+MAX_BATCH_SIZE = 100
+# Batch reservations (POST /books/_reserve).
+MAX_RESERVE_ITEMS = 100
+
+def _book_saved(book, data):
+    """Propagate a successful create/update to the read cache and local indexes."""
+    book_cache.refresh(book.ISBN, data, book.version)
+    similar_books.upsert(book.ISBN, book.title, book.Author, book.genre, book.description)
+    catalog_search.upsert(book.ISBN, book.title, book.Author, book.description, book.genre, book.price)
+    title_autocomplete.upsert(book.ISBN, book.title, book.Author, getattr(book, title_autocomplete.score_field))
+
+
+# Reads fetch plain rows and skip BookSerializer (see book_representation).
+_BOOK_ROW = BOOK_READ_FIELDS + ('version',)
+
+
+def _load_book(isbn):
+    row = Book.objects.filter(ISBN=isbn).values_list(*_BOOK_ROW).first()
+    if row is None:
+        raise Http404
+    return CachedBook(book_representation(row[:-1]), row[-1])
+
+
+def _load_books(isbns):
+    """Serialize the existing books among `isbns` with a single IN query."""
+    return {
+        row[0]: CachedBook(book_representation(row[:-1]), row[-1])
+        for row in Book.objects.filter(ISBN__in=isbns).values_list(*_BOOK_ROW)
+    }
+
+
+def _book_etag(version):
+    return f'"{version}"'
+
+
+def _if_none_match(request, etag):
+    """True when If-None-Match names `etag` (weak comparison, as RFC 9110 asks)."""
+    header = request.headers.get('If-None-Match', '').strip()
+    if not header:
+        return False
+    if header == '*':
+        return True
+    return etag in (tag.strip().removeprefix('W/') for tag in header.split(','))
+
+
+def _if_match_versions(request):
+    """
+    Versions listed in If-Match, or None when the header is absent or "*".
+    Weak or malformed tags never match a version.
+    """
+    header = request.headers.get('If-Match', '').strip()
+    if not header or header == '*':
+        return None
+    versions = []
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+
+def _update_book(request, isbn, fields):
+    """
+    Write `fields` to the book with one UPDATE of just those columns, bumping
+    its version, and answer with the new representation. With If-Match the
+    UPDATE only applies to the listed versions (412 otherwise).
+    """
+    books = Book.objects.filter(ISBN=isbn)
+    versions = _if_match_versions(request)
+    if versions is not None:
+        books = books.filter(version__in=versions)
+    if not books.update(**fields, version=F('version') + 1):
+        if versions is not None and Book.objects.filter(ISBN=isbn).exists():
+            return Response({"message": "Book was modified by someone else"}, status=412)
+        return Response({"message": "ISBN not found"}, status=404)
+    book = Book.objects.get(ISBN=isbn)
+    data = BookSerializer(book).data
+    # Replace the cached copy so readers never see the old price/quantity.
+    _book_saved(book, data)
+    return Response(data, status=200, headers={'ETag': _book_etag(book.version)})
+
+
+def _batch_lookup(isbns, fields=None):
+    """
+    Resolve many ISBNs at once: cached books are served from the read cache,
+    the rest are fetched with a single IN query. Items keep request order
+    and are narrowed to `fields` (see read_fields).
+    """
+    # De-duplicate while preserving the order the client asked in.
+    isbns = list(dict.fromkeys(isbn.strip() for isbn in isbns if isbn.strip()))
+    if not isbns or len(isbns) > MAX_BATCH_SIZE:
+        return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+    found = book_cache.get_many_or_load(isbns, _load_books)
+    return Response(
+        {
+            "items": [project(found[isbn].data, fields) for isbn in isbns if isbn in found],
+            "missing": [isbn for isbn in isbns if isbn not in found],
+        },
+        status=200
+    )
+
+
+def _stock_changed(levels):
+    """Propagate {isbn: new quantity} after a reservation."""
+    book_cache.invalidate(*levels)
+    if title_autocomplete.score_field == 'quantity':
+        for isbn, quantity in levels.items():
+            title_autocomplete.rescore(isbn, quantity)
+
+
+def _reserve_quantity(value):
+    """A positive int number of copies, or None for anything else."""
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= MAX_RESERVE_QUANTITY:
+        return None
+    return value
+
+
+def _reservation_failed(exc):
+    if exc.available is None:
+        return Response({"message": "ISBN not found", "ISBN": exc.isbn}, status=404)
+    return Response(
+        {"message": "Insufficient stock", "ISBN": exc.isbn, "available": exc.available},
+        status=409
+    )
+
+
+def _books_imported(isbns):
+    """Propagate a committed bulk-import chunk to the read cache and local indexes."""
+    book_cache.invalidate(*isbns)
+    # Cheaper to rebuild once on next use than to patch thousands of rows.
+    similar_books.reset()
+    catalog_search.reset()
+    title_autocomplete.reset()
+
 
 # ------------------------------------------------------------
-# API View for creating a new Book (POST /books)
+# API View for creating a new Book (POST /books) and listing books (GET /books)
 # ------------------------------------------------------------
 class BookCreateAPIView(APIView):
+    def get(self, request, format=None):
+        # ?fields=ISBN,title narrows every item to those fields.
+        try:
+            fields = read_fields(request.query_params.get('fields'))
+        except ValueError:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+
+        # ?isbn=a,b,c switches to a batch lookup of exactly those books.
+        if 'isbn' in request.query_params:
+            return _batch_lookup(request.query_params['isbn'].split(','), fields)
+
+        # Keyset pagination: ?after=<last ISBN of the previous page>&limit=<n>.
+        # WHERE ISBN > after ORDER BY ISBN LIMIT n+1 walks the primary key, so
+        # a deep page costs the same as the first one (no OFFSET scan).
+        after = request.query_params.get('after')
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+
+        books = Book.objects.order_by('ISBN')
+        if after:
+            books = books.filter(ISBN__gt=after)
+        # One extra row tells us whether there is a next page.
+        if fields is None:
+            rows = list(books.values_list(*BOOK_READ_FIELDS)[:limit + 1])
+            items = [book_representation(row) for row in rows[:limit]]
+        else:
+            # Only the requested columns (plus the ISBN cursor) are read.
+            rows = list(books.values_list('ISBN', *fields)[:limit + 1])
+            items = [book_projection(row[1:], fields) for row in rows[:limit]]
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return Response(
+            {"items": items, "next": next_cursor},
+            status=200
+        )
+
     def post(self, request, format=None):
         # Instantiate the serializer with the incoming JSON data.
         serializer = BookSerializer(data=request.data)
@@ -28,6 +217,8 @@ class BookCreateAPIView(APIView):
             # Check if a book with the same ISBN already exists in the database.
             # If the ISBN is unique, save the new book record to the database.
             book = serializer.save()
+            # Seed the read cache and local indexes with the new book.
+            _book_saved(book, serializer.data)
             # Build the absolute URL for the newly created book using the reverse lookup.
             location = request.build_absolute_uri(reverse('book_detail', args=[book.ISBN]))
             headers = {'Location': location}  # Set the Location header as required.
@@ -48,16 +239,33 @@ class BookCreateAPIView(APIView):
         )
 
 # ------------------------------------------------------------
-# API View for retrieving and updating a Book (GET and PUT /books/<isbn>)
+# API View for retrieving and updating a Book (GET, PUT and PATCH /books/<isbn>)
 # ------------------------------------------------------------
 class BookDetailAPIView(APIView):
     def get(self, request, isbn, format=None):
-        # Retrieve the book object by its ISBN; if not found, a 404 error is automatically returned.
-        book = get_object_or_404(Book, ISBN=isbn)
-        # Serialize the book object into JSON format.
-        serializer = BookSerializer(book)
+        try:
+            fields = read_fields(request.query_params.get('fields'))
+        except ValueError:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        # Serve from the read cache; the cached copy knows its version, so a
+        # matching If-None-Match is answered 304 without serializing anything.
+        # A ?fields= projection is cut from the cached copy.
+        entry = book_cache.get(isbn)
+        if entry is None:
+            if request.headers.get('If-None-Match'):
+                # Cache miss while revalidating: compare versions with a
+                # single-column lookup before paying for a full load.
+                version = Book.objects.filter(ISBN=isbn).values_list('version', flat=True).first()
+                if version is not None and _if_none_match(request, _book_etag(version)):
+                    return Response(status=304, headers={'ETag': _book_etag(version)})
+            # Retrieve the book by its ISBN (404 if not found), serialize it
+            # and populate the cache.
+            entry = book_cache.load(isbn, lambda: _load_book(isbn))
+        etag = _book_etag(entry.version)
+        if _if_none_match(request, etag):
+            return Response(status=304, headers={'ETag': etag})
         # Return the serialized data with a 200 OK status.
-        return Response(serializer.data, status=200)
+        return Response(project(entry.data, fields), status=200, headers={'ETag': etag})
     
     def put(self, request, isbn, format=None):
         # Ensure that the ISBN in the request body matches the ISBN in the URL.
@@ -72,110 +280,336 @@ class BookDetailAPIView(APIView):
         serializer = BookSerializer(book, data=request.data)
         # Validate the new data.
         if serializer.is_valid():
-            # Save the updated book record to the database.
-            serializer.save()
-            # Return the updated book data with a 200 OK status.
-            return Response(serializer.data, status=200)
+            # Save the updated book record (honouring If-Match) and return it.
+            return _update_book(request, isbn, serializer.validated_data)
         # If validation fails, return a 400 response with error details.
         return Response(
             {"message": "Illegal, missing, or malformed input", "errors": serializer.errors},
             status=400
         )
 
+    def patch(self, request, isbn, format=None):
+        # Only the supplied fields are validated and written; the ISBN itself
+        # cannot change.
+        if not isinstance(request.data, dict):
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        if request.data.get('ISBN', isbn) != isbn:
+            return Response(
+                {"message": "ISBN in URL and body do not match"},
+                status=400
+            )
+        data = {name: value for name, value in request.data.items() if name != 'ISBN'}
+        serializer = BookSerializer(data=data, partial=True)
+        if not serializer.is_valid():
+            return Response(
+                {"message": "Illegal, missing, or malformed input", "errors": serializer.errors},
+                status=400
+            )
+        # Unknown keys are dropped by the serializer; there must be something left to write.
+        if not serializer.validated_data:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        return _update_book(request, isbn, serializer.validated_data)
+
+# ------------------------------------------------------------
+# API View for batch lookups (POST /books/_batch)
+# ------------------------------------------------------------
+# Same as GET /books/?isbn=a,b,c for lists too long for a query string.
+# Body: {"isbns": ["a", "b", "c"]}; ?fields= narrows the items as on GET.
+class BookBatchAPIView(APIView):
+    def post(self, request, format=None):
+        isbns = request.data.get('isbns') if isinstance(request.data, dict) else None
+        if not isinstance(isbns, list) or not all(isinstance(isbn, str) for isbn in isbns):
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        try:
+            fields = read_fields(request.query_params.get('fields'))
+        except ValueError:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        return _batch_lookup(isbns, fields)
+
+# ------------------------------------------------------------
+# API View for reserving stock of one book (POST /books/<isbn>/reserve)
+# ------------------------------------------------------------
+# Body: {"quantity": n}. Answers with the new stock level, or 409 (and the
+# current level) when fewer than n copies are left.
+class BookReserveAPIView(APIView):
+    def post(self, request, isbn, format=None):
+        n = _reserve_quantity(request.data.get('quantity') if isinstance(request.data, dict) else None)
+        if n is None:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        try:
+            quantity = reserve(isbn, n)
+        except ReservationError as exc:
+            return _reservation_failed(exc)
+        _stock_changed({isbn: quantity})
+        return Response({"ISBN": isbn, "quantity": quantity}, status=200)
+
+# ------------------------------------------------------------
+# API View for reserving stock of several books at once (POST /books/_reserve)
+# ------------------------------------------------------------
+# Body: {"items": [{"ISBN": "a", "quantity": 1}, ...]}. All or nothing: if any
+# book is unknown or short, nothing is reserved.
+class BookBatchReserveAPIView(APIView):
+    def post(self, request, format=None):
+        items = request.data.get('items') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not 1 <= len(items) <= MAX_RESERVE_ITEMS:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        quantities = {}
+        for item in items:
+            isbn = item.get('ISBN') if isinstance(item, dict) else None
+            n = _reserve_quantity(item.get('quantity')) if isinstance(item, dict) else None
+            if not isinstance(isbn, str) or not isbn or n is None:
+                return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+            # The same ISBN listed twice reserves the sum.
+            quantities[isbn] = quantities.get(isbn, 0) + n
+        try:
+            levels = reserve_many(quantities)
+        except ReservationError as exc:
+            return _reservation_failed(exc)
+        _stock_changed(levels)
+        return Response(
+            {"items": [{"ISBN": isbn, "quantity": levels[isbn]} for isbn in quantities]},
+            status=200
+        )
+
+# ------------------------------------------------------------
+# API View for bulk importing books (POST /books/_bulk)
+# ------------------------------------------------------------
+# Body: NDJSON (one book per line) or CSV with a header row, streamed.
+# Query params: mode=insert|upsert (default insert), chunk_size=1..5000.
+class BookBulkImportAPIView(APIView):
+    def post(self, request, format=None):
+        mode = request.query_params.get('mode', 'insert')
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', DEFAULT_CHUNK_SIZE))
+        except ValueError:
+            chunk_size = 0
+        if mode not in ('insert', 'upsert') or not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+
+        # Read the raw stream line by line; request.data would buffer the whole body.
+        content_type = request.content_type.split(';')[0].strip().lower()
+        try:
+            rows = iter_rows(request.stream or [], content_type)
+        except UnsupportedFormat:
+            return Response({"message": "Body must be NDJSON or CSV"}, status=415)
+
+        report = import_books(rows, upsert=(mode == 'upsert'), chunk_size=chunk_size, on_chunk=_books_imported)
+        # Per-row problems are listed in the report; the request itself succeeded.
+        return Response(report.as_dict(), status=200)
+
+# ------------------------------------------------------------
+# View for streaming the whole catalog (GET /books/export?format=ndjson|csv)
+# ------------------------------------------------------------
+# Plain Django view: DRF reserves the `format` query parameter for renderer
+# negotiation.
+class BookExportView(View):
+    FORMATS = {
+        'ndjson': (ndjson_lines, 'application/x-ndjson'),
+        'csv': (csv_lines, 'text/csv'),
+    }
+
+    def get(self, request):
+        fmt = request.GET.get('format', 'ndjson')
+        if fmt not in self.FORMATS:
+            return HttpResponse(status=400)
+        lines, content_type = self.FORMATS[fmt]
+        response = StreamingHttpResponse(streaming_content(request, lines()), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+        return response
+
+# ---------------------------------------------------------------------------
+# Catalog search (books/search.py)
+# ---------------------------------------------------------------------------
+SEARCH_BACKEND       = "auto"                                  # "auto" (FULLTEXT on MySQL, else local) | "fulltext" | "local"
+SEARCH_PAGE_SIZE     = 20                                      # results per page by default
+SEARCH_MAX_PAGE_SIZE = 100                                     # largest ?limit= accepted
+SEARCH_MAX_QUERY     = 200                                     # longest ?q= accepted (characters)
+
+catalog_search = CatalogSearchIndex()
+
+
+def _search_backend():
+    if SEARCH_BACKEND == "auto":
+        return fulltext_search if connection.vendor == "mysql" else _local_search
+    return fulltext_search if SEARCH_BACKEND == "fulltext" else _local_search
+
+
+def _local_search(*args, **kwargs):
+    catalog_search.ensure_built()
+    return catalog_search.search(*args, **kwargs)
+
+
+def _parse_price(value):
+    """Decimal for a ?min_price=/?max_price= value, None when absent; raises ValueError."""
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(value)
+    if not price.is_finite() or price < 0:
+        raise ValueError(value)
+    return price
+
+# ------------------------------------------------------------
+# API View for searching the catalog (GET /books/search)
+# ------------------------------------------------------------
+# Query params: q (required), genre, min_price, max_price, page (1-based), limit,
+# fields (comma-separated projection of each item).
+# Results are ranked by relevance; "total" counts every match.
+class BookSearchAPIView(APIView):
+    def get(self, request, format=None):
+        query = request.query_params.get('q', '').strip()
+        genre = request.query_params.get('genre') or None
+        try:
+            min_price = _parse_price(request.query_params.get('min_price'))
+            max_price = _parse_price(request.query_params.get('max_price'))
+            page = int(request.query_params.get('page', 1))
+            limit = int(request.query_params.get('limit', SEARCH_PAGE_SIZE))
+            fields = read_fields(request.query_params.get('fields'))
+        except ValueError:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        if not query or len(query) > SEARCH_MAX_QUERY or page < 1 or not 1 <= limit <= SEARCH_MAX_PAGE_SIZE:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+
+        total, isbns = _search_backend()(
+            query, genre=genre, min_price=min_price, max_price=max_price,
+            offset=(page - 1) * limit, limit=limit,
+        )
+        # Fetch the page through the read cache, keeping the ranking order.
+        found = book_cache.get_many_or_load(isbns, _load_books) if isbns else {}
+        return Response(
+            {
+                "items": [project(found[isbn].data, fields) for isbn in isbns if isbn in found],
+                "total": total,
+                "page": page,
+                "limit": limit,
+            },
+            status=200
+        )
+
+# ---------------------------------------------------------------------------
+# Type-ahead (books/autocomplete.py)
+# ---------------------------------------------------------------------------
+AUTOCOMPLETE_SCORE_FIELD = "quantity"                          # Book field ranking suggestions, higher first
+AUTOCOMPLETE_TOP_K       = 10                                  # most suggestions per answer
+AUTOCOMPLETE_SCAN_LIMIT  = 256                                 # prefixes matching more keys get precomputed answers
+
+title_autocomplete = PrefixIndex(
+    score_field=AUTOCOMPLETE_SCORE_FIELD,
+    top_k=AUTOCOMPLETE_TOP_K,
+    scan_limit=AUTOCOMPLETE_SCAN_LIMIT,
+)
+
+# ------------------------------------------------------------
+# API View for title/author type-ahead (GET /books/autocomplete?q=<prefix>&limit=<n>)
+# ------------------------------------------------------------
+# Served from memory only; the database is read once per process to build
+# the index, which create/update then keep current.
+class BookAutocompleteAPIView(APIView):
+    def get(self, request, format=None):
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', AUTOCOMPLETE_TOP_K))
+        except ValueError:
+            limit = 0
+        if not query.strip() or len(query) > SEARCH_MAX_QUERY or not 1 <= limit <= AUTOCOMPLETE_TOP_K:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        title_autocomplete.ensure_built()
+        return Response({"items": title_autocomplete.complete(query, limit)}, status=200)
+
 # ---------------------------------------------------------------------------
 # Circuit‑breaker parameters
 # ---------------------------------------------------------------------------
-CIRCUIT_FILE       = Path("/tmp/related_books_circuit.json")   # mount an emptyDir here in K8S
+SHM_DIR            = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+CIRCUIT_SEGMENT    = SHM_DIR / "related_books_circuit"             # shared by every worker on the pod
 RECOMMEND_SERVICE_URL = "3.130.6.49"                # external service URL
-OPEN_INTERVAL_SECS = 60                                        # stay OPEN for 60 s
+OPEN_INTERVAL_SECS = 60                                        # stay OPEN for 60 s
 REQUEST_TIMEOUT    = 3                                         # external call timeout
+FAILURE_RATE_THRESHOLD = 0.5                                   # open at ≥ 50 % failed calls …
+MINIMUM_CALLS      = 5                                         # … once this many calls were seen
+ROLLING_WINDOW_SECS = 30                                       # … within this rolling window
 
 # ---------------------------------------------------------------------------
-# Utility helpers
+# Recommendation result cache
 # ---------------------------------------------------------------------------
-def _load_state():
-    """
-    Returns {'open': bool, 'opened_at': float}.
-    Missing file == CLOSED.
-    """
-    if not CIRCUIT_FILE.exists():
-        return {"open": False, "opened_at": 0.0}
+RELATED_CACHE_SIZE   = 10000                                   # max ISBNs remembered
+RELATED_CACHE_TTL    = 300                                     # fresh lifetime of a list of related books
+RELATED_NEGATIVE_TTL = 60                                      # fresh lifetime of a “no related books” answer
+RELATED_STALE_SECS   = 60                                      # serve stale + refresh in background this long
+RELATED_FALLBACK_MAX_AGE = 24 * 3600                           # last-known-good used while the breaker is open
 
-    try:
-        with CIRCUIT_FILE.open("r") as fp:
-            data = json.load(fp)
-        # Coerce types / defaults
-        return {
-            "open": bool(data.get("open", False)),
-            "opened_at": float(data.get("opened_at", 0.0)),
-        }
-    except Exception:
-        # Corrupted file → fail closed
-        return {"open": False, "opened_at": 0.0}
-
-def _save_state(open_, opened_at=0.0):
-    """Persist breaker state atomically."""
-    tmp_path = CIRCUIT_FILE.with_suffix(".tmp")
-    with tmp_path.open("w") as fp:
-        json.dump({"open": open_, "opened_at": opened_at}, fp)
-    os.replace(tmp_path, CIRCUIT_FILE)  # atomic rename
-
-
-def _should_fast_fail(state):
-    """Return True if circuit is OPEN _and_ still inside the 60‑second window."""
-    return state["open"] and (time.time() - state["opened_at"] < OPEN_INTERVAL_SECS)
+# ---------------------------------------------------------------------------
+# Local related-books index (books/similar.py)
+# ---------------------------------------------------------------------------
+RELATED_BOOKS_MODE   = "fallback"                              # "fallback" | "local" | "remote"
+LOCAL_NEIGHBOURS     = 10                                      # related books kept per book
+LOCAL_MAX_FEATURES   = 4096                                    # TF-IDF vocabulary cap
+LOCAL_REBUILD_AFTER  = 500                                     # full rebuild after this many upserts
+
+similar_books = SimilarBooksIndex(
+    neighbours=LOCAL_NEIGHBOURS,
+    max_features=LOCAL_MAX_FEATURES,
+    rebuild_after=LOCAL_REBUILD_AFTER,
+)
+
+related_breaker = CircuitBreaker(
+    CIRCUIT_SEGMENT,
+    open_interval=OPEN_INTERVAL_SECS,
+    failure_rate_threshold=FAILURE_RATE_THRESHOLD,
+    minimum_calls=MINIMUM_CALLS,
+    window_secs=ROLLING_WINDOW_SECS,
+)
+
+related_books = RelatedBooksClient(
+    f"http://{RECOMMEND_SERVICE_URL}",
+    related_breaker,
+    RecommendationCache(
+        max_entries=RELATED_CACHE_SIZE,
+        ttl=RELATED_CACHE_TTL,
+        negative_ttl=RELATED_NEGATIVE_TTL,
+        stale_secs=RELATED_STALE_SECS,
+        fallback_max_age=RELATED_FALLBACK_MAX_AGE,
+    ),
+    local_index=similar_books,
+    mode=RELATED_BOOKS_MODE,
+    timeout=REQUEST_TIMEOUT,
+)
 
 # ------------------------------------------------------------
 # API View for retrieving related books from external service (GET /books/<isbn>/)
 # ------------------------------------------------------------
-class BookRelatedAPIView(APIView):
-    def get(self, request, isbn, format=None):
-        # Retrieve the book object by its ISBN; if not found, a 404 error is automatically returned.
-        print("isbn in request:", isbn)
+# Plain async Django view (DRF's APIView is sync-only): while the downstream
+# call is pending the worker keeps serving other requests, and concurrent
+# callers for the same ISBN share one downstream call. Answers are cached;
+# stale ones are refreshed in the background and the last-known-good answer
+# is served while the breaker is open, or the local index's answer if there
+# is none.
+class BookRelatedAPIView(View):
+    async def get(self, request, isbn):
+        status, payload = await related_books.fetch(isbn)
+        if payload is None:
+            return HttpResponse(status=status)
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        return HttpResponse(renderer.render(payload), status=status, content_type=renderer.media_type)
 
-        # --- circuit‑breaker pre‑check --------------------------------------------------
-        state = _load_state()
-        if _should_fast_fail(state):
-            # Circuit already OPEN → respond immediately
-            return Response({"message": "Circuit open — try later"}, status=503)
 
-        # After 60 s we let *one* request probe the downstream service.
-        # (If the breaker is CLOSED `state["open"]` is False and we simply continue.)
-        url = f"http://{RECOMMEND_SERVICE_URL}/recommended-titles/isbn/{isbn}"
-
-        try:
-            ext_resp = requests.get(url, timeout=REQUEST_TIMEOUT)
-
-        except requests.exceptions.Timeout:
-            # ---- TIMEOUT → OPEN the circuit & report 504 ------------------------------
-            _save_state(open_=True, opened_at=time.time())
-            return Response({"message": "External service timeout"}, status=504)
-
-        # ---- External service returned within 3 s --------------------------------------
-        status = ext_resp.status_code
-
-        if status == 200:
-            # success path ⇒ be sure circuit is CLOSED
-            _save_state(open_=False)
-            return Response(ext_resp.json(), status=200)
-
-        if status in (204, 404):
-            # “no related books”            –> 204 + EMPTY body
-            _save_state(open_=False)
-            return Response(status=204)
-
-        if status == 503:
-            # Downstream signals its own OPEN breaker
-            # Treat like a failure, but *keep* our breaker state:
-            #   - if it was CLOSED, we OPEN it now
-            #   - if it was OPEN and we were probing (first call after 60 s),
-            #     we refresh the timer.
-            _save_state(open_=True, opened_at=time.time())
-            return Response({"message": "Circuit open (downstream unavailable)"}, status=503)
-
-        # Any other code is an unexpected failure – treat like 500 for safety
-        _save_state(open_=True, opened_at=time.time())
-        return Response({"message": f"Unexpected downstream status {status}"}, status=503)
+# ------------------------------------------------------------
+# API View for internal cache/engine statistics (GET /books/_stats)
+# ------------------------------------------------------------
+class StatsAPIView(APIView):
+    def get(self, request, format=None):
+        return Response(
+            {
+                "book_cache": book_cache.stats(),
+                "related_breaker": related_breaker.stats(),
+                "related_books": related_books.snapshot(),
+                "similar_books": similar_books.snapshot(),
+                "catalog_search": catalog_search.snapshot(),
+                "title_autocomplete": title_autocomplete.snapshot(),
+            },
+            status=200,
+        )
 
 
 # ------------------------------------------------------------
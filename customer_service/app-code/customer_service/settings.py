@@ -71,10 +71,43 @@ TEMPLATES = [
 WSGI_APPLICATION = 'customer_service.wsgi.application'
 
 # Rest Framework
+# JSON goes through orjson when it is installed (see customers/renderers.py).
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'customers.renderers.FastJSONRenderer',
     ),
+    'DEFAULT_PARSER_CLASSES': (
+        'customers.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# In-process cache for customer lookups by id and userId (see customers/cache.py)
+CUSTOMER_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "TTL": 30,
+    "NEGATIVE_TTL": 2,
+}
+
+# Customer events on Kafka (see customers/events.py)
+# PRODUCER goes to confluent_kafka.Producer unchanged. linger.ms and
+# batch.num.messages trade a few milliseconds of latency for fewer, larger
+# requests; publishing never blocks the request either way.
+CUSTOMER_EVENTS = {
+    "TOPIC": "yuyangx2.customer.evt",
+    "PRODUCER": {
+        "bootstrap.servers": "3.129.102.184:9092,18.118.230.221:9093,3.130.6.49:9094",
+        "linger.ms": 20,
+        "batch.num.messages": 1000,
+        "compression.type": "lz4",
+        "acks": "all",
+        "enable.idempotence": True,
+        "message.timeout.ms": 30000,
+        "queue.buffering.max.messages": 100000,
+    },
+    "POLL_INTERVAL": 0.1,
+    "FLUSH_TIMEOUT": 5,
 }
 
 # Database
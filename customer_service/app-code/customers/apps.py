@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customers'
+
+    def ready(self):
+        # Keep the lookup cache in step with every customer write (customers/cache.py).
+        from .cache import invalidate_customer
+        from .models import Customer
+        post_save.connect(invalidate_customer, sender=Customer, dispatch_uid='customers.cache')
+        post_delete.connect(invalidate_customer, sender=Customer, dispatch_uid='customers.cache.delete')
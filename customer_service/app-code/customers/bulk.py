@@ -0,0 +1,156 @@
+import csv
+import json
+
+from django.db import DatabaseError, IntegrityError, transaction
+
+from .events import customer_event, enqueue_many
+from .models import Customer, user_id_key
+from .serializers import CustomerSerializer
+
+# ------------------------------------------------------------
+# Streaming bulk import for customers
+# ------------------------------------------------------------
+# Rows are read one line at a time from the request stream (NDJSON or CSV
+# with a header row) and validated by CustomerSerializer itself, which runs
+# no queries (userId is declared explicitly, so there is no UniqueValidator).
+# Each chunk then costs one SELECT for userIds already taken, one multi-row
+# INSERT of customers and one of their customer.evt outbox events, all in
+# one transaction, so a chunk's customers and events commit together. Only
+# the current chunk and a capped error report are held in memory.
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json")
+CSV_TYPES = ("text/csv", "application/csv")
+
+USER_ID_TAKEN = "This user ID already exists in the system."
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+# ------------------------------------------------------------
+# Parsing
+# ------------------------------------------------------------
+def iter_rows(stream, content_type):
+    """
+    Yield (row_number, row) from `stream`; row is a dict, or None when the
+    line could not be parsed at all.
+    """
+    if content_type in NDJSON_TYPES:
+        return _iter_ndjson(stream)
+    if content_type in CSV_TYPES:
+        return _iter_csv(stream)
+    raise UnsupportedFormat(content_type)
+
+
+def _iter_ndjson(stream):
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _iter_csv(stream):
+    lines = (line.decode("utf-8-sig") if isinstance(line, bytes) else line for line in stream)
+    for number, row in enumerate(csv.DictReader(lines), start=1):
+        yield number, row
+
+
+# ------------------------------------------------------------
+# Import
+# ------------------------------------------------------------
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, number, userId, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": number, "userId": userId, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "received": self.received,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_customers(rows, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """
+    Validate and write `rows` (from iter_rows). userIds that already exist,
+    or repeat within the upload, are reported as failures. `on_chunk` is
+    called with the userIds of every committed chunk.
+    """
+    report = ImportReport()
+    chunk = {}                                  # user_id_key(userId) -> (row number, validated data)
+    for number, row in rows:
+        report.received += 1
+        if row is None:
+            report.fail(number, None, {"non_field_errors": ["Malformed row."]})
+            continue
+        serializer = CustomerSerializer(data=row)
+        if not serializer.is_valid():
+            report.fail(number, row.get("userId"), serializer.errors)
+            continue
+        userId = serializer.validated_data["userId"]
+        # Keyed the way the unique index compares userIds, so two spellings
+        # of one userId are caught here instead of failing the whole INSERT.
+        key = user_id_key(userId)
+        if key in chunk:
+            report.fail(number, userId, {"userId": ["Duplicate user ID in this upload."]})
+            continue
+        chunk[key] = (number, serializer.validated_data)
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, report, on_chunk)
+            chunk = {}
+    if chunk:
+        _write_chunk(chunk, report, on_chunk)
+    return report
+
+
+def _write_chunk(chunk, report, on_chunk):
+    # A sign-up can take one of these userIds between our SELECT and INSERT;
+    # the unique index then rejects the whole INSERT, and one more pass (with
+    # a fresh SELECT) drops the newly taken userIds.
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                userIds = [data["userId"] for _, data in chunk.values()]
+                for userId in Customer.objects.filter(userId__in=userIds).order_by().values_list("userId", flat=True):
+                    number, data = chunk.pop(user_id_key(userId))
+                    report.fail(number, data["userId"], {"userId": [USER_ID_TAKEN]})
+                customers = [Customer(**data) for _, data in chunk.values()]
+                Customer.objects.bulk_create(customers)
+                enqueue_many(customer_event(customer) for customer in customers)
+        except IntegrityError as exc:
+            if attempt == 0:
+                continue
+            return _chunk_failed(chunk, report, exc)
+        except DatabaseError as exc:
+            return _chunk_failed(chunk, report, exc)
+        break
+
+    report.created += len(chunk)
+    if on_chunk is not None and chunk:
+        on_chunk([data["userId"] for _, data in chunk.values()])
+
+
+def _chunk_failed(chunk, report, exc):
+    for number, data in chunk.values():
+        report.fail(number, data["userId"], {"non_field_errors": [f"Database error: {exc}"]})
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import user_id_key
+
+# ------------------------------------------------------------
+# In-process read-through cache for customer lookups
+# ------------------------------------------------------------
+#   id     -> row      (a CUSTOMER_READ_FIELDS tuple, bounded LRU, TTL)
+#   userId -> id       (bounded LRU, TTL; None marks an unknown userId)
+#
+# userIds are keyed by user_id_key(), the way the unique index compares
+# them, so every spelling of one userId shares (and invalidates) one entry.
+#
+# A lookup by userId resolves the id first and then reads the row through
+# the id side, so each customer is stored once whichever way it is found.
+# Unknown userIds are remembered for NEGATIVE_TTL seconds, so scripts that
+# enumerate email addresses mostly stop at the cache instead of MySQL.
+#
+# Every Customer save or delete invalidates both keys once its transaction
+# commits (the post_save/post_delete receivers below, connected in
+# CustomersConfig.ready()), so this process never serves a row older than
+# its own last committed write. Other worker processes rely on the TTLs:
+# NEGATIVE_TTL is kept short because a userId that was unknown a moment
+# ago is exactly what a sign-up creates.
+
+DEFAULTS = {
+    "MAX_ENTRIES": 10000,   # LRU capacity of each map (0 disables the cache)
+    "TTL": 30,              # seconds a customer row lives in the cache
+    "NEGATIVE_TTL": 2,      # seconds an unknown userId is remembered
+}
+
+
+class CustomerCache:
+    def __init__(self, max_entries, ttl, negative_ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._rows = OrderedDict()          # id -> (expires_at, row)
+        self._ids = OrderedDict()           # user_id_key(userId) -> (expires_at, id or None)
+        self._lock = threading.Lock()
+        self._writes = 0                    # bumped on every invalidation, guards racing loads
+        self._counters = {
+            "id_hits": 0,
+            "id_misses": 0,
+            "userId_hits": 0,
+            "userId_negative_hits": 0,
+            "userId_misses": 0,
+            "invalidations": 0,
+            "evictions": 0,
+        }
+
+    @classmethod
+    def from_settings(cls):
+        conf = {**DEFAULTS, **getattr(settings, "CUSTOMER_CACHE", {})}
+        return cls(
+            max_entries=conf["MAX_ENTRIES"],
+            ttl=conf["TTL"],
+            negative_ttl=conf["NEGATIVE_TTL"],
+        )
+
+    # --------------------------------------------------------
+    # Reads
+    # --------------------------------------------------------
+    def get_by_id(self, id, loader):
+        """
+        The row for customer `id`. `loader()` reads it on a miss; exceptions
+        it raises (e.g. Http404) propagate and nothing is cached.
+        """
+        with self._lock:
+            row = self._get(self._rows, id)
+            self._counters["id_hits" if row is not None else "id_misses"] += 1
+        if row is not None:
+            return row
+        token = self._writes
+        row = loader()
+        with self._lock:
+            # An invalidation landed while we were loading: our copy may predate it.
+            if token == self._writes:
+                self._store(self._rows, id, row, self.ttl)
+        return row
+
+    def get_by_user_id(self, userId, loader, user_id_index):
+        """
+        The row whose userId is `userId`, or None if there is none. `loader()`
+        returns the row or None on a miss; user_id_index is the position of
+        userId within a row.
+        """
+        key = user_id_key(userId)
+        with self._lock:
+            entry = self._get(self._ids, key, default=False)
+            if entry is None:
+                self._counters["userId_negative_hits"] += 1
+                return None
+            row = self._get(self._rows, entry) if entry is not False else None
+            # The userId -> id link can outlive a change of that customer's userId.
+            if row is not None and user_id_key(row[user_id_index]) == key:
+                self._counters["userId_hits"] += 1
+                return row
+            self._counters["userId_misses"] += 1
+        token = self._writes
+        row = loader()
+        with self._lock:
+            if token == self._writes:
+                if row is None:
+                    self._store(self._ids, key, None, self.negative_ttl)
+                else:
+                    self._store(self._rows, row[0], row, self.ttl)
+                    self._store(self._ids, key, row[0], self.ttl)
+        return row
+
+    def _get(self, entries, key, default=None):
+        # Caller holds self._lock.
+        entry = entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del entries[key]
+            return default
+        entries.move_to_end(key)
+        return entry[1]
+
+    # --------------------------------------------------------
+    # Writes
+    # --------------------------------------------------------
+    def invalidate(self, ids=(), userIds=()):
+        """Drop the entries for customers that were created, changed or deleted."""
+        with self._lock:
+            self._writes += 1
+            for id in ids:
+                self._rows.pop(id, None)
+            for userId in userIds:
+                self._ids.pop(user_id_key(userId), None)
+            self._counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self._rows.clear()
+            self._ids.clear()
+
+    def _store(self, entries, key, value, ttl):
+        # Caller holds self._lock.
+        if self.max_entries <= 0:
+            return
+        entries[key] = (time.monotonic() + ttl, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    # --------------------------------------------------------
+    # Monitoring
+    # --------------------------------------------------------
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            rows, ids = len(self._rows), len(self._ids)
+        id_lookups = counters["id_hits"] + counters["id_misses"]
+        userId_hits = counters["userId_hits"] + counters["userId_negative_hits"]
+        userId_lookups = userId_hits + counters["userId_misses"]
+        return {
+            **counters,
+            "rows": rows,
+            "userIds": ids,
+            "max_entries": self.max_entries,
+            "id_hit_ratio": round(counters["id_hits"] / id_lookups, 4) if id_lookups else 0.0,
+            "userId_hit_ratio": round(userId_hits / userId_lookups, 4) if userId_lookups else 0.0,
+        }
+
+
+customer_cache = CustomerCache.from_settings()
+
+
+def invalidate_customer(sender, instance, **kwargs):
+    """post_save/post_delete receiver: forget `instance` once the write commits."""
+    ids, userIds = [instance.id], [instance.userId]
+    # Invalidating only after commit keeps a concurrent reader from caching
+    # the pre-write state (or a negative entry) after we have cleared it.
+    transaction.on_commit(lambda: customer_cache.invalidate(ids, userIds))
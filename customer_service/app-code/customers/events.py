@@ -0,0 +1,206 @@
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------
+# Customer events on Kafka (customer.evt)
+# ------------------------------------------------------------
+# Requests never talk to Kafka. enqueue() writes the event to the outbox
+# table (OutboxEvent) inside the transaction that saves the customer, so the
+# event exists exactly when the customer does. `manage.py
+# relay_customer_events` then publishes pending rows in batches and marks
+# them delivered once the brokers acknowledge them: at-least-once delivery,
+# whatever the brokers are doing while the POST runs.
+#
+# The relay publishes through CustomerEventPublisher: one
+# confluent_kafka.Producer per process, created on the first publish (after
+# any worker fork, so it is never shared across processes). publish() only
+# appends to librdkafka's local queue, which batches and sends in its own
+# threads. A daemon thread here calls poll() to run the delivery callbacks,
+# which count deliveries and failures. Queued events are flushed, for up to
+# FLUSH_TIMEOUT seconds, when the process exits.
+#
+# PRODUCER is handed to confluent_kafka.Producer as is; linger.ms,
+# batch.num.messages and compression.type set the batching trade-off.
+
+DEFAULTS = {
+    "TOPIC": "yuyangx2.customer.evt",
+    "PRODUCER": {
+        "bootstrap.servers": "3.129.102.184:9092,18.118.230.221:9093,3.130.6.49:9094",
+    },
+    "POLL_INTERVAL": 0.1,   # seconds the poll thread blocks waiting for callbacks
+    "FLUSH_TIMEOUT": 5,     # seconds to deliver what is still queued at exit
+}
+RECENT_FAILURES = 20
+
+
+class CustomerEventPublisher:
+    def __init__(self, topic, producer_config, poll_interval=0.1, flush_timeout=5):
+        self.topic = topic
+        self.producer_config = producer_config
+        self.poll_interval = poll_interval
+        self.flush_timeout = flush_timeout
+        self._producer = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._failures = deque(maxlen=RECENT_FAILURES)
+        self._counters = {"queued": 0, "delivered": 0, "failed": 0, "queue_full": 0}
+
+    @classmethod
+    def from_settings(cls):
+        conf = {**DEFAULTS, **getattr(settings, "CUSTOMER_EVENTS", {})}
+        return cls(
+            topic=conf["TOPIC"],
+            producer_config=conf["PRODUCER"],
+            poll_interval=conf["POLL_INTERVAL"],
+            flush_timeout=conf["FLUSH_TIMEOUT"],
+        )
+
+    @property
+    def producer(self):
+        if self._producer is None:
+            with self._lock:
+                if self._producer is None:
+                    from confluent_kafka import Producer
+                    self._producer = Producer(self.producer_config)
+                    threading.Thread(target=self._poll, name="customer-events-poll", daemon=True).start()
+                    atexit.register(self.close)
+        return self._producer
+
+    def _poll(self):
+        while not self._closed.is_set():
+            self._producer.poll(self.poll_interval)
+
+    def _delivered(self, err, msg):
+        # Runs on the poll thread.
+        if err is None:
+            self._counters["delivered"] += 1
+            return
+        self._failed(str(err))
+
+    def _failed(self, error):
+        self._counters["failed"] += 1
+        self._failures.append({"at": time.time(), "error": error})
+        logger.error("customer event not delivered to %s: %s", self.topic, error)
+
+    # --------------------------------------------------------
+    # Publishing
+    # --------------------------------------------------------
+    def publish(self, event, key=None, topic=None, on_delivery=None):
+        """
+        Queue `event` (a JSON-serializable dict, or already encoded JSON) for
+        `topic` without waiting for the broker; on_delivery(err, msg) runs
+        once the broker has answered. Returns False if it could not even be
+        queued.
+        """
+        from confluent_kafka import KafkaException
+
+        producer = self.producer
+        value = event if isinstance(event, (str, bytes)) else json.dumps(event)
+        callback = self._delivered
+        if on_delivery is not None:
+            def callback(err, msg):
+                self._delivered(err, msg)
+                on_delivery(err, msg)
+        for attempt in range(2):
+            try:
+                producer.produce(topic or self.topic, value=value, key=key, on_delivery=callback)
+                self._counters["queued"] += 1
+                return True
+            except BufferError:
+                # Local queue full (brokers unreachable for a while): give
+                # the delivery callbacks one chance to drain it, then give up.
+                self._counters["queue_full"] += 1
+                if attempt == 0:
+                    producer.poll(self.poll_interval)
+            except KafkaException as exc:
+                self._failed(str(exc))
+                return False
+        self._failed("local producer queue is full")
+        return False
+
+    def flush(self, timeout):
+        """Wait up to `timeout` seconds for queued events; return how many are left."""
+        return self.producer.flush(timeout)
+
+    def close(self):
+        """Stop polling and deliver what is still queued, for up to flush_timeout."""
+        if self._producer is None or self._closed.is_set():
+            return
+        self._closed.set()
+        remaining = self._producer.flush(self.flush_timeout)
+        if remaining:
+            logger.error("%d customer events still queued at shutdown", remaining)
+
+    def snapshot(self):
+        return {
+            **self._counters,
+            "topic": self.topic,
+            "in_queue": len(self._producer) if self._producer is not None else 0,
+            "recent_failures": list(self._failures),
+        }
+
+
+customer_events = CustomerEventPublisher.from_settings()
+
+
+def customer_event(customer):
+    """The customer.evt message for a newly created customer."""
+    return {
+        "userId": customer.userId,
+        "name": customer.name,
+        "phone": customer.phone,
+        "address": customer.address,
+        "address2": customer.address2,
+        "city": customer.city,
+        "state": customer.state,
+        "zipcode": customer.zipcode,
+    }
+
+
+def enqueue(event, key=None, topic=None):
+    """Record `event` in the outbox. Call it inside the transaction that caused it."""
+    return OutboxEvent.objects.create(topic=topic or customer_events.topic, key=key, payload=json.dumps(event))
+
+
+def enqueue_many(events, topic=None):
+    """enqueue() for many events at once: one multi-row INSERT."""
+    topic = topic or customer_events.topic
+    return OutboxEvent.objects.bulk_create(
+        [OutboxEvent(topic=topic, payload=json.dumps(event)) for event in events]
+    )
+
+
+def outbox_snapshot():
+    """
+    Relay health, read from the outbox itself since the relay runs in its
+    own process: how far behind it is, and how many events it has failed to
+    deliver (claimed, but the lease ran out without a broker ack).
+    """
+    now = timezone.now()
+    pending = OutboxEvent.objects.filter(delivered_at__isnull=True).aggregate(
+        pending=Count('id'),
+        in_flight=Count('id', filter=Q(locked_until__gte=now)),
+        failed=Count('id', filter=Q(locked_until__lt=now)),
+        max_attempts=Max('attempts'),
+        oldest=Min('created_at'),
+    )
+    last_delivered = OutboxEvent.objects.aggregate(last=Max('delivered_at'))['last']
+    oldest = pending.pop('oldest')
+    return {
+        **pending,
+        "max_attempts": pending["max_attempts"] or 0,
+        "lag_seconds": round((now - oldest).total_seconds(), 1) if oldest else 0.0,
+        "last_delivered_seconds_ago": round((now - last_delivered).total_seconds(), 1) if last_delivered else None,
+    }
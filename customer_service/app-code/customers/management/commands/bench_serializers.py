@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.settings import api_settings
+
+from customers.models import Customer
+from customers.serializers import CUSTOMER_READ_FIELDS, CustomerSerializer, customer_representation
+
+# ------------------------------------------------------------
+# Read-path serialization cost: CustomerSerializer vs customer_representation
+# ------------------------------------------------------------
+#   python manage.py bench_serializers --objects 500 --rounds 20
+#   python manage.py bench_serializers --from-db   # the first N stored customers
+#
+# Both paths start from the same values_list() rows. The DRF path builds a
+# Customer per row and runs CustomerSerializer(many=True), which is what the
+# views did before; the fast path calls customer_representation(). Each round
+# renders the result with the configured renderer, and the two outputs must
+# be byte-identical or the command fails.
+
+
+def synthetic_rows(n):
+    return [
+        (
+            i + 1,
+            f"bench{i}@example.com",
+            f"Bench Customer {i}",
+            f"+1{i:010d}",
+            f"{i} Main St",
+            None if i % 2 else f"Apt {i % 40}",
+            "Pittsburgh",
+            "PA",
+            "15213",
+        )
+        for i in range(n)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare CustomerSerializer with the read fast path (cost per object, identical output)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=500)
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument("--from-db", action="store_true", help="serialize stored customers instead of synthetic rows")
+
+    def handle(self, *args, **options):
+        n, rounds = options["objects"], options["rounds"]
+        if options["from_db"]:
+            rows = list(Customer.objects.values_list(*CUSTOMER_READ_FIELDS)[:n])
+            if not rows:
+                raise CommandError("No customers stored; drop --from-db to use synthetic rows.")
+        else:
+            rows = synthetic_rows(n)
+        # The renderer the API actually ships with (FastJSONRenderer).
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+        def drf():
+            customers = [Customer(**dict(zip(CUSTOMER_READ_FIELDS, row))) for row in rows]
+            return renderer.render(CustomerSerializer(customers, many=True).data)
+
+        def fast():
+            return renderer.render([customer_representation(row) for row in rows])
+
+        if drf() != fast():
+            raise CommandError("Fast path output differs from CustomerSerializer.")
+
+        results = {name: self._time(path, rounds) for name, path in (("CustomerSerializer", drf), ("fast path", fast))}
+        for name, seconds in results.items():
+            self.stdout.write(f"{name:<18} {seconds / len(rows) * 1e6:8.2f} us/object")
+        self.stdout.write(
+            f"objects={len(rows)} rounds={rounds} output=identical "
+            f"speedup={results['CustomerSerializer'] / results['fast path']:.1f}x"
+        )
+
+    @staticmethod
+    def _time(path, rounds):
+        # Best of `rounds`: the least disturbed by GC and other processes.
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            path()
+            best = min(best, time.perf_counter() - started)
+        return best
@@ -0,0 +1,107 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from customers.events import customer_events
+from customers.models import OutboxEvent
+
+# ------------------------------------------------------------
+# Outbox relay: OutboxEvent rows -> Kafka
+# ------------------------------------------------------------
+#   python manage.py relay_customer_events                 # run forever
+#   python manage.py relay_customer_events --once          # drain, then exit
+#
+# Each round claims up to --batch-size pending rows (oldest first) by
+# leasing them for --ack-timeout seconds, publishes them all, and waits for
+# the brokers to acknowledge them. So at most --batch-size events are in
+# flight at a time. Acknowledged rows are marked delivered in one UPDATE.
+# The rest keep their lease and are retried once it runs out, which also
+# covers a relay that dies mid-batch. The claim uses SKIP LOCKED where the
+# database has it, so several relays can share one outbox. A row is marked
+# delivered only after its ack, so delivery is at least once: consumers may
+# see an event twice, never zero times.
+#
+# Delivered rows are pruned after --retention hours.
+
+
+class Command(BaseCommand):
+    help = "Publish pending customer events from the outbox to Kafka."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="most events in flight at once")
+        parser.add_argument("--ack-timeout", type=float, default=30.0, help="seconds to wait for a batch's acks")
+        parser.add_argument("--interval", type=float, default=1.0, help="seconds to sleep when nothing is pending")
+        parser.add_argument("--retention", type=float, default=24.0, help="hours delivered events are kept")
+        parser.add_argument("--once", action="store_true", help="exit once nothing is pending")
+
+    def handle(self, *args, **options):
+        batch_size, ack_timeout = options["batch_size"], options["ack_timeout"]
+        retention = timedelta(hours=options["retention"])
+        totals = {"delivered": 0, "failed": 0, "pruned": 0}
+        try:
+            while True:
+                claimed, delivered = self.relay_batch(batch_size, ack_timeout)
+                totals["delivered"] += delivered
+                totals["failed"] += claimed - delivered
+                if claimed:
+                    self.stdout.write(f"relayed {delivered}/{claimed} events")
+                if claimed < batch_size:
+                    # Caught up: prune, then wait for new events.
+                    totals["pruned"] += self.prune(timezone.now() - retention, batch_size)
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"{totals} producer={customer_events.snapshot()}")
+
+    def claim(self, batch_size, lease):
+        """Lease up to `batch_size` pending events to this relay; return them oldest first."""
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                OutboxEvent.objects
+                .select_for_update(skip_locked=True)
+                .filter(delivered_at__isnull=True)
+                .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            OutboxEvent.objects.filter(id__in=ids).update(
+                locked_until=now + timedelta(seconds=lease), attempts=F("attempts") + 1
+            )
+        return list(OutboxEvent.objects.filter(id__in=ids).order_by("id").values_list("id", "topic", "key", "payload"))
+
+    def relay_batch(self, batch_size, ack_timeout):
+        events = self.claim(batch_size, ack_timeout)
+        if not events:
+            return 0, 0
+        acked = []
+
+        def on_delivery(id):
+            def callback(err, msg):
+                if err is None:
+                    acked.append(id)
+            return callback
+
+        for id, topic, key, payload in events:
+            customer_events.publish(payload, key=key, topic=topic, on_delivery=on_delivery(id))
+        customer_events.flush(ack_timeout)
+        if acked:
+            OutboxEvent.objects.filter(id__in=acked).update(delivered_at=timezone.now(), locked_until=None)
+        return len(events), len(acked)
+
+    def prune(self, before, batch_size):
+        pruned = 0
+        while True:
+            ids = list(
+                OutboxEvent.objects.filter(delivered_at__lt=before).order_by("delivered_at", "id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return pruned
+            pruned += OutboxEvent.objects.filter(id__in=ids).delete()[0]
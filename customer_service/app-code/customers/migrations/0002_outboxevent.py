@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('topic', models.CharField(max_length=255)),
+                ('key', models.CharField(blank=True, max_length=255, null=True)),
+                ('payload', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['delivered_at', 'id'], name='customers_outbox_delivery')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:46
+
+from django.db import migrations, models
+
+# The unique index (bookstore.sql's unique_userId) that POST /customers now
+# relies on instead of a SELECT before the INSERT. Creating it fails if
+# duplicate userIds already slipped past that racy check; merge them first.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='userId',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
@@ -1,9 +1,17 @@
 from django.db import models
 
+def user_id_key(userId):
+    """
+    userId as the unique index compares it: MySQL's default collation is
+    case-insensitive, so "ABC@x.com" and "abc@x.com" are the same customer.
+    """
+    return userId.casefold()
+
+
 # Customer model
 class Customer(models.Model):
     id = models.AutoField(primary_key=True)
-    userId = models.CharField(max_length=255)
+    userId = models.CharField(max_length=255, unique=True)   # unique_userId in bookstore.sql
     name = models.CharField(max_length=255)
     phone = models.CharField(max_length=50)
     address = models.CharField(max_length=255)
@@ -17,3 +25,24 @@ class Customer(models.Model):
     
     class Meta:
         ordering = ['id']
+
+
+# Transactional outbox for customer events (see customers/events.py).
+# Rows are written in the same transaction as the change they describe and
+# published to Kafka by `manage.py relay_customer_events`.
+class OutboxEvent(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, blank=True, null=True)
+    payload = models.TextField()                                    # JSON, sent as is
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_until = models.DateTimeField(blank=True, null=True)     # claimed by a relay until then
+    delivered_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Pending rows (delivered_at IS NULL ORDER BY id) and pruning.
+            models.Index(fields=['delivered_at', 'id'], name='customers_outbox_delivery'),
+        ]
@@ -0,0 +1,66 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+# ------------------------------------------------------------
+# orjson-backed JSON renderer and parser
+# ------------------------------------------------------------
+# Drop-in replacements for DRF's JSONRenderer/JSONParser (see REST_FRAMEWORK
+# in settings.py). With orjson installed the common case (compact UTF-8
+# output, UTF-8 request bodies) is encoded/decoded in C; everything else,
+# and every environment without orjson, goes through the stock classes.
+#
+# Output is the same bytes JSONRenderer writes: compact separators, no
+# ASCII escaping, U+2028/U+2029 escaped. Types orjson does not know
+# (Decimal, lazy strings, ...) and datetimes go through DRF's own
+# JSONEncoder.default, so e.g. prices come out as the same float or string
+# COERCE_DECIMAL_TO_STRING asks for. Known differences, none of which the
+# API produces: floats outside 1e-4..1e16 lose the "+" in their exponent
+# (1e16 vs 1e+16), and NaN/Infinity render as null instead of failing.
+#
+# Request bodies orjson rejects are re-read by JSONParser, so the accepted
+# inputs and the error messages are unchanged. Integers wider than 64 bits
+# decode as floats, which the serializers reject just as they rejected the
+# out-of-range ints.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let JSONParser accept what it always accepted (lone surrogates,
+            # say) or raise its usual ParseError.
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -1,3 +1,187 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .cache import customer_cache
+from .models import Customer, OutboxEvent
+
+
+def customer_payload(userId="starlord@example.com"):
+    return {
+        "userId": userId,
+        "name": "Star Lord",
+        "phone": "+14122144122",
+        "address": "48 Galaxy Rd",
+        "city": "Pittsburgh",
+        "state": "PA",
+        "zipcode": "15213",
+    }
+
+
+class CustomerCreateTests(TestCase):
+    def test_create_is_one_insert_per_table(self):
+        # No SELECT for the userId check: the unique index does that job.
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().post("/customers/", customer_payload(), format="json")
+        self.assertEqual(response.status_code, 201)
+        statements = [query["sql"].split()[0].upper() for query in queries.captured_queries]
+        data_statements = [statement for statement in statements if statement in ("SELECT", "INSERT")]
+        self.assertEqual(data_statements, ["INSERT", "INSERT"])      # customer + outbox event
+
+    def test_duplicate_user_id_is_422(self):
+        client = APIClient()
+        self.assertEqual(client.post("/customers/", customer_payload(), format="json").status_code, 201)
+        response = client.post("/customers/", customer_payload(), format="json")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json(), {"message": "This user ID already exists in the system."})
+        # The rejected insert left neither a customer nor an event behind.
+        self.assertEqual(Customer.objects.count(), 1)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+
+class OutboxStatsTests(TestCase):
+    def test_relay_lag_and_failures(self):
+        APIClient().post("/customers/", customer_payload("one@example.com"), format="json")
+        APIClient().post("/customers/", customer_payload("two@example.com"), format="json")
+        # One event was claimed by a relay whose lease ran out without an ack.
+        OutboxEvent.objects.filter(id=OutboxEvent.objects.first().id).update(
+            locked_until=timezone.now() - timedelta(seconds=1), attempts=1
+        )
+        outbox = APIClient().get("/customers/_stats").json()["outbox"]
+        self.assertEqual((outbox["pending"], outbox["in_flight"], outbox["failed"], outbox["max_attempts"]), (2, 0, 1, 1))
+        self.assertGreaterEqual(outbox["lag_seconds"], 0)
+        self.assertIsNone(outbox["last_delivered_seconds_ago"])
+
+
+class CustomerCacheTests(TestCase):
+    def setUp(self):
+        customer_cache.clear()
+        self.client = APIClient()
+
+    def sign_up(self):
+        # TestCase never commits, so run the cache's on_commit invalidation by hand.
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/customers/", customer_payload(), format="json")
+
+    def test_repeat_lookups_skip_the_database(self):
+        id = self.sign_up().json()["id"]
+        self.client.get(f"/customers/{id}")
+        self.client.get("/customers/", {"userId": customer_payload()["userId"]})
+        with self.assertNumQueries(0):
+            by_id = self.client.get(f"/customers/{id}")
+            by_user_id = self.client.get("/customers/", {"userId": customer_payload()["userId"]})
+            projected = self.client.get(f"/customers/{id}", {"fields": "id,name"})
+        self.assertEqual(by_id.json(), by_user_id.json())
+        self.assertEqual(projected.json(), {"id": id, "name": "Star Lord"})
+
+    def test_unknown_user_id_is_remembered_until_sign_up(self):
+        userId = customer_payload()["userId"]
+        self.assertEqual(self.client.get("/customers/", {"userId": userId}).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/customers/", {"userId": userId}).status_code, 404)
+        self.sign_up()
+        self.assertEqual(self.client.get("/customers/", {"userId": userId}).status_code, 200)
+
+    def test_sign_up_clears_other_spellings(self):
+        self.assertEqual(self.client.get("/customers/", {"userId": "STARLORD@example.com"}).status_code, 404)
+        self.sign_up()
+        # SQLite compares case-sensitively, so only the cache's part is checked here.
+        with self.assertNumQueries(1):
+            self.client.get("/customers/", {"userId": "STARLORD@example.com"})
+
+    def test_writes_invalidate(self):
+        id = self.sign_up().json()["id"]
+        self.client.get(f"/customers/{id}")
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer.objects.filter(id=id).get().delete()
+        self.assertEqual(self.client.get(f"/customers/{id}").status_code, 404)
+
+
+class CustomerBulkTests(TestCase):
+    def setUp(self):
+        customer_cache.clear()
+        self.client = APIClient()
+
+    def import_ndjson(self, rows, **params):
+        body = "\n".join(json.dumps(row) for row in rows) + "\n"
+        query = "".join(f"&{name}={value}" for name, value in params.items())
+        return self.client.generic("POST", f"/customers/_bulk?{query[1:]}", body, content_type="application/x-ndjson")
+
+    def test_bulk_import(self):
+        self.client.post("/customers/", customer_payload("taken@example.com"), format="json")
+        rows = [customer_payload(f"user{n}@example.com") for n in range(5)]
+        rows += [customer_payload("taken@example.com"), customer_payload("user0@example.com"), {"userId": "nope"}]
+        # Per chunk: one SELECT for taken userIds and one INSERT each for customers and events.
+        with CaptureQueriesContext(connection) as queries:
+            report = self.import_ndjson(rows, chunk_size=4).json()
+        statements = [query["sql"].split()[0].upper() for query in queries.captured_queries]
+        self.assertEqual([statement for statement in statements if statement in ("SELECT", "INSERT")], ["SELECT", "INSERT", "INSERT"] * 2)
+        self.assertEqual((report["received"], report["created"], report["failed"]), (8, 5, 3))
+        errors = {error["row"]: error["errors"] for error in report["errors"]}
+        self.assertEqual(sorted(errors), [6, 7, 8])
+        self.assertEqual(errors[6], {"userId": ["This user ID already exists in the system."]})
+        self.assertEqual(Customer.objects.count(), 6)
+        self.assertEqual(OutboxEvent.objects.count(), 6)
+
+    def test_bulk_import_user_ids_differing_in_case(self):
+        # MySQL's unique index treats these as one userId; so does the import.
+        report = self.import_ndjson([customer_payload("Mixed@example.com"), customer_payload("mixed@example.com")]).json()
+        self.assertEqual((report["created"], report["failed"]), (1, 1))
+        self.assertEqual(report["errors"][0]["errors"], {"userId": ["Duplicate user ID in this upload."]})
+
+    def test_bulk_import_clears_negative_cache(self):
+        userId = customer_payload()["userId"]
+        self.assertEqual(self.client.get("/customers/", {"userId": userId}).status_code, 404)
+        self.import_ndjson([customer_payload()])
+        self.assertEqual(self.client.get("/customers/", {"userId": userId}).status_code, 200)
+
+    def test_batch_lookup(self):
+        self.import_ndjson([customer_payload(f"user{n}@example.com") for n in range(3)])
+        ids = list(Customer.objects.values_list("id", flat=True))
+        with self.assertNumQueries(1):
+            by_id = self.client.get("/customers/", {"ids": f"{ids[2]},{ids[0]},999,{ids[2]}"}).json()
+        self.assertEqual([item["id"] for item in by_id["items"]], [ids[2], ids[0]])
+        self.assertEqual(by_id["missing"], [999])
+        by_user_id = self.client.get("/customers/", {"userIds": "user1@example.com,nobody@example.com", "fields": "id,name"}).json()
+        self.assertEqual(by_user_id, {"items": [{"id": ids[1], "name": "Star Lord"}], "missing": ["nobody@example.com"]})
+        spellings = self.client.get("/customers/", {"userIds": "user1@example.com,USER1@example.com"}).json()
+        self.assertEqual((len(spellings["items"]), spellings["missing"]), (1, []))
+        for params in (
+            {"ids": "1,x"}, {"ids": "1", "userIds": "a"}, {"ids": ""}, {"ids": ",".join(map(str, range(101)))},
+            {"ids": "1", "fields": "id,password"}, {"userId": "user1@example.com", "fields": ","},
+        ):
+            self.assertEqual(self.client.get("/customers/", params).status_code, 400)
+
+
+class ConcurrentSignUpTests(TransactionTestCase):
+    THREADS = 8
+
+    def test_concurrent_sign_ups_create_one_customer(self):
+        if connection.vendor == "sqlite":
+            self.skipTest("SQLite serializes writers; run against MySQL to exercise the race")
+        start = threading.Barrier(self.THREADS)
+        statuses = []
+
+        def sign_up():
+            try:
+                start.wait()
+                response = APIClient().post("/customers/", customer_payload(), format="json")
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=sign_up) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201] + [422] * (self.THREADS - 1))
+        self.assertEqual(Customer.objects.filter(userId=customer_payload()["userId"]).count(), 1)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
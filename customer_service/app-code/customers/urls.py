@@ -1,10 +1,12 @@
 from django.urls import path
-from .views import CustomerListCreateAPIView, CustomerDetailAPIView, StatusAPIView
+from .views import CustomerBulkImportAPIView, CustomerListCreateAPIView, CustomerDetailAPIView, StatsAPIView, StatusAPIView
 
 urlpatterns = [
     # Monitoring endpoint
     path('status', StatusAPIView.as_view(), name='status'),
+    path('_stats', StatsAPIView.as_view(), name='stats'),
     # Customer endpoints:
     path('', CustomerListCreateAPIView.as_view(), name='customer_collection'),
+    path('_bulk', CustomerBulkImportAPIView.as_view(), name='bulk_import_customers'),
     path('<str:id>', CustomerDetailAPIView.as_view(), name='customer_detail'),
 ]
\ No newline at end of file
@@ -1,67 +1,133 @@
 # Import necessary modules and classes:
-import json
-from confluent_kafka import Producer
+import hashlib
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework.views import APIView             # Base class for our API views
 from rest_framework.response import Response         # DRF Response for returning data in JSON format
 from rest_framework import status                   # Provides HTTP status code constants (optional use)
 from django.shortcuts import get_object_or_404       # Helper to retrieve an object or return 404 if not found
 from django.urls import reverse                      # Used to build URLs dynamically based on view names
-from .models import Customer                   # Import our database models (Customer)
-from .serializers import CustomerSerializer  # Import serializers for data validation and transformation
+from .models import Customer, user_id_key      # Import our database models (Customer)
+from .cache import customer_cache  # Read-through cache for customer lookups
+from .bulk import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, UnsupportedFormat, import_customers, iter_rows
+from .events import customer_event, enqueue, outbox_snapshot  # Transactional outbox for customer events
+from .serializers import CUSTOMER_READ_FIELDS, CustomerSerializer, customer_representation, read_fields  # Import serializers for data validation and transformation
+
+# Batch lookup (GET /customers/?ids=1,2,3 or ?userIds=a,b,c).
+MAX_BATCH_SIZE = 100
+
+# Columns hashed into a customer's ETag; also the serializer's output order.
+CUSTOMER_FIELDS = CUSTOMER_READ_FIELDS
+_FIELD_INDEX = {name: index for index, name in enumerate(CUSTOMER_FIELDS)}
+
+
+def _project(row, fields):
+    """The `fields` columns of a full CUSTOMER_FIELDS row."""
+    if fields == CUSTOMER_FIELDS:
+        return row
+    return tuple(row[_FIELD_INDEX[name]] for name in fields)
+
+
+def _customer_etag(row):
+    """Strong ETag: a hash of the stored column values (no version column here)."""
+    return '"%s"' % hashlib.blake2b(repr(row).encode(), digest_size=12).hexdigest()
+
+
+def _if_none_match(request, etag):
+    """True when If-None-Match names `etag` (weak comparison, as RFC 9110 asks)."""
+    header = request.headers.get('If-None-Match', '').strip()
+    if not header:
+        return False
+    if header == '*':
+        return True
+    return etag in (tag.strip().removeprefix('W/') for tag in header.split(','))
+
+
+def _customer_response(request, row, fields=CUSTOMER_FIELDS):
+    """
+    200 with the customer and its ETag, or 304 when the client's copy is
+    current. The ETag comes from the raw row, and the body is built from it
+    directly (see customer_representation), so no model instance is made.
+    `row` holds just `fields` when the client asked for a projection.
+    """
+    etag = _customer_etag(row)
+    if _if_none_match(request, etag):
+        return Response(status=304, headers={'ETag': etag})
+    data = customer_representation(row) if fields == CUSTOMER_FIELDS else dict(zip(fields, row))
+    return Response(data, status=200, headers={'ETag': etag})
+
+
+def _batch_lookup(key, values, fields):
+    """
+    Resolve many customers by `key` ('id' or 'userId') with a single IN
+    query. Items keep request order and are narrowed to `fields`.
+    """
+    values = [value.strip() for value in values if value.strip()]
+    if key == 'id':
+        try:
+            values = [int(value) for value in values]
+        except ValueError:
+            values = []
+    # userIds match the way the unique index compares them (see user_id_key).
+    normalize = user_id_key if key == 'userId' else (lambda value: value)
+    # De-duplicate while preserving the order the client asked in.
+    unique = {}
+    for value in values:
+        unique.setdefault(normalize(value), value)
+    values = list(unique.values())
+    if not values or len(values) > MAX_BATCH_SIZE:
+        return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+    # Only the requested columns (plus the lookup key) are read.
+    rows = Customer.objects.filter(**{key + '__in': values}).values_list(key, *fields)
+    found = {normalize(row[0]): row[1:] for row in rows}
+    return Response(
+        {
+            "items": [
+                customer_representation(found[normalize(value)]) if fields == CUSTOMER_FIELDS
+                else dict(zip(fields, found[normalize(value)]))
+                for value in values if normalize(value) in found
+            ],
+            "missing": [value for value in values if normalize(value) not in found],
+        },
+        status=200
+    )
+
+
+def _customers_imported(userIds):
+    """Forget negative cache entries for the userIds of a committed bulk-import chunk."""
+    customer_cache.invalidate(userIds=userIds)
 
 
 # ------------------------------------------------------------
 # API View for handling customer creation and lookup by userId (POST and GET /customers)
 # ------------------------------------------------------------
 class CustomerListCreateAPIView(APIView):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Kafka Producer Configuration
-        brokers = '3.129.102.184:9092,18.118.230.221:9093,3.130.6.49:9094'
-        self.producer = Producer({
-            'bootstrap.servers': brokers,  # Use a placeholder for Kafka brokers
-        })
-
-    def _send_customer_event_to_kafka(self, customer):
-        # Create the message in JSON format
-        customer_data = {
-            "userId": customer.userId,
-            "name": customer.name,
-            "phone": customer.phone,
-            "address": customer.address,
-            "address2": customer.address2,
-            "city": customer.city,
-            "state": customer.state,
-            "zipcode": customer.zipcode,
-        }
-
-        # Serialize the message to JSON
-        message = json.dumps(customer_data)
-
-        # Send the message to the Kafka topic
-        self.producer.produce('yuyangx2.customer.evt', value=message)
-        self.producer.flush()  # Ensure the message is sent
+    def _record_customer_event(self, customer):
+        # Written to the outbox in the caller's transaction; the relay
+        # publishes it to the customer.evt topic (see customers/events.py).
+        enqueue(customer_event(customer))
         
     def post(self, request, format=None):
         # Instantiate the serializer with incoming customer data.
         serializer = CustomerSerializer(data=request.data)
         if serializer.is_valid():
-            # Check if a customer with the given userId (email) already exists.
-            if Customer.objects.filter(userId=serializer.validated_data.get('userId')).exists():
+            # Save the new customer and its customer.evt event together:
+            # both are committed or neither is. A taken userId is caught by
+            # the unique index on the INSERT itself, with no prior SELECT,
+            # so two concurrent sign-ups cannot both succeed.
+            try:
+                with transaction.atomic():
+                    customer = serializer.save()
+                    self._record_customer_event(customer)
+            except IntegrityError:
                 return Response(
                     {"message": "This user ID already exists in the system."},
                     status=422
                 )
-            # Save the new customer to the database.
-            customer = serializer.save()
             # Build the URL for retrieving the new customer by their ID.
             location = request.build_absolute_uri(reverse('customer_detail', args=[customer.id]))
             headers = {'Location': location}
 
-            # Send a Kafka message to the customer.evt topic
-            self._send_customer_event_to_kafka(customer)
-
             # Return the serialized customer data with HTTP status 201 and the Location header.
             return Response(serializer.data, status=201, headers=headers)
 
@@ -73,17 +139,34 @@ class CustomerListCreateAPIView(APIView):
     def get(self, request, format=None):
         # Retrieve the customer by the userId passed as a query parameter.
         userId = request.query_params.get('userId')
+        try:
+            # ?fields=id,name narrows both the SELECT and the response.
+            fields = read_fields(request.query_params.get('fields'))
+        except ValueError:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+
+        # ?ids=1,2,3 or ?userIds=a,b,c switches to a batch lookup of exactly those customers.
+        batch = [key for key in ('ids', 'userIds') if key in request.query_params]
+        if batch:
+            if len(batch) > 1 or userId:
+                return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+            key = batch[0]
+            return _batch_lookup(key[:-1], request.query_params[key].split(','), fields)
+
         if not userId:
             return Response({"message": "Illegal, missing, or malformed input"}, status=400)
-        try:
-            # Try to find the customer with the given email (userId).
-            customer = Customer.objects.get(userId=userId)
-        except Customer.DoesNotExist:
+        # Find the customer with the given email (userId), through the cache.
+        # The full row is cached so any ?fields= projection can be served from it.
+        row = customer_cache.get_by_user_id(
+            userId,
+            lambda: Customer.objects.values_list(*CUSTOMER_FIELDS).filter(userId=userId).first(),
+            _FIELD_INDEX['userId'],
+        )
+        if row is None:
             # If not found, return a 404 response.
             return Response({"message": "User-ID does not exist in the system"}, status=404)
-        # Serialize and return the customer data with a 200 OK status.
-        serializer = CustomerSerializer(customer)
-        return Response(serializer.data, status=200)
+        # Serialize and return the customer data with a 200 OK status (or 304).
+        return _customer_response(request, _project(row, fields), fields)
 
 # ------------------------------------------------------------
 # API View for retrieving a customer by their numeric ID (GET /customers/<id>)
@@ -92,14 +175,50 @@ class CustomerDetailAPIView(APIView):
     def get(self, request, id, format=None):
         try:
             customer_id = int(id)
+            # ?fields=id,name narrows both the SELECT and the response.
+            fields = read_fields(request.query_params.get('fields'))
+        except ValueError:
+            return Response({"message": "Illegal, missing, or malformed input"}, status=400)
+        # Retrieve the customer by numeric ID, through the cache; returns 404
+        # if the customer does not exist (misses by id are not cached).
+        row = customer_cache.get_by_id(
+            customer_id, lambda: get_object_or_404(Customer.objects.values_list(*CUSTOMER_FIELDS), id=customer_id)
+        )
+        # Serialize and return the data, or 304 if the client's copy is current.
+        return _customer_response(request, _project(row, fields), fields)
+
+# ------------------------------------------------------------
+# API View for bulk importing customers (POST /customers/_bulk)
+# ------------------------------------------------------------
+# Body: NDJSON (one customer per line) or CSV with a header row, streamed.
+# Query params: chunk_size=1..5000. Existing userIds are reported, not updated.
+class CustomerBulkImportAPIView(APIView):
+    def post(self, request, format=None):
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', DEFAULT_CHUNK_SIZE))
         except ValueError:
+            chunk_size = 0
+        if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
             return Response({"message": "Illegal, missing, or malformed input"}, status=400)
-        # Retrieve the customer by numeric ID; returns 404 if the customer does not exist.
-        customer = get_object_or_404(Customer, id=id)
-        # Serialize the customer object.
-        serializer = CustomerSerializer(customer)
-        # Return the serialized data.
-        return Response(serializer.data, status=200)
+
+        # Read the raw stream line by line; request.data would buffer the whole body.
+        content_type = request.content_type.split(';')[0].strip().lower()
+        try:
+            rows = iter_rows(request.stream or [], content_type)
+        except UnsupportedFormat:
+            return Response({"message": "Body must be NDJSON or CSV"}, status=415)
+
+        report = import_customers(rows, chunk_size=chunk_size, on_chunk=_customers_imported)
+        # Per-row problems are listed in the report; the request itself succeeded.
+        return Response(report.as_dict(), status=200)
+
+# ------------------------------------------------------------
+# API View for internal counters (GET /customers/_stats)
+# ------------------------------------------------------------
+class StatsAPIView(APIView):
+    def get(self, request, format=None):
+        return Response({"customer_cache": customer_cache.stats(), "outbox": outbox_snapshot()}, status=200)
+
 
 # ------------------------------------------------------------
 # API View for the status endpoint (GET /status)
@@ -1,16 +1,355 @@
-from fastapi import Header, FastAPI, HTTPException, Query, Depends, Response
-from fastapi.responses import JSONResponse
+from fastapi import Header, FastAPI, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+import asyncio
+import hashlib
+import json
+import os
+import time
 import httpx
-from jose import jwt
-from datetime import datetime, timezone
+from jose import JOSEError, jws, jwt
+from collections import OrderedDict
 from typing import Optional
-
-app = FastAPI()
+from contextlib import asynccontextmanager
 
 # Base URLs for backend services (using in-cluster DNS names)
 BOOK_SERVICE_URL = "http://book-service:3000"
+BOOK_ASYNC_SERVICE_URL = "http://book-service:3001"   # the book service's ASGI server (related-books)
 CUSTOMER_SERVICE_URL = "http://customer-service:3000"
 
+# ---------------------------
+# JSON Encoding
+# ---------------------------
+# Upstream bodies are decoded with loads() and responses are encoded by
+# FastJSONResponse (the app's default response class). Both use orjson when
+# it is installed and the stdlib json module otherwise; the bytes on the
+# wire are the same either way (compact separators, UTF-8, no ASCII
+# escaping). orjson spells floats outside 1e-4..1e16 without the "+" in the
+# exponent (1e16 vs 1e+16), which is the same number to any JSON reader.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(content: bytes):
+    """Decode a JSON body (bytes or str)."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass                    # e.g. ints wider than 64 bits: let json handle it
+        return super().render(content)
+
+# ---------------------------
+# Pass-through Proxying
+# ---------------------------
+# Routes that hand back the backend's answer unchanged relay its bytes with
+# passthrough() instead of decoding the JSON only to encode it again: the
+# body is streamed to the client as it arrives, together with the status and
+# the PASSTHROUGH_HEADERS. Error answers are still decoded and wrapped in
+# {"detail": ...} like on every other route. Only routes that reshape the
+# payload parse it.
+
+PASSTHROUGH_HEADERS = (
+    "Content-Type", "Content-Length", "Content-Encoding",
+    "Location", "ETag", "Cache-Control", "Last-Modified", "Vary",
+)
+
+
+def forwarded_headers(response: httpx.Response) -> dict:
+    return {name: response.headers[name] for name in PASSTHROUGH_HEADERS if name in response.headers}
+
+
+def upstream_unreachable(exc: httpx.RequestError) -> HTTPException:
+    """502 for an unreachable backend, a timeout or a dropped connection."""
+    return HTTPException(status_code=502, detail=f"Upstream request failed: {type(exc).__name__}")
+
+
+def upstream_error(response: httpx.Response) -> HTTPException:
+    """The backend's error status and (already read) body as an HTTPException."""
+    # Errors are usually our JSON, but Django's own error pages are HTML.
+    try:
+        detail = loads(response.content)
+    except Exception:
+        detail = {"detail": response.text.strip() or str(response.status_code)}
+    return HTTPException(status_code=response.status_code, detail=detail)
+
+
+async def upstream_request(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """Send the request and return the answer if it succeeded; for routes that reshape the body."""
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.RequestError as exc:
+        raise upstream_unreachable(exc)
+    if not response.is_success:
+        raise upstream_error(response)
+    return response
+
+
+async def passthrough(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> StreamingResponse:
+    """Send the request and stream a successful answer back byte for byte."""
+    try:
+        response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+        if not response.is_success:
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+    except httpx.RequestError as exc:
+        raise upstream_unreachable(exc)
+    if not response.is_success:
+        raise upstream_error(response)
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=forwarded_headers(response),
+        background=BackgroundTask(response.aclose),
+    )
+
+
+# ---------------------------
+# Upstream Connection Pools
+# ---------------------------
+# Every route shares one long-lived AsyncClient per backend so proxied calls
+# reuse warm keep-alive connections instead of opening a new TCP connection
+# per request. Limits and timeouts can be tuned through the environment;
+# the defaults match what a bare httpx.AsyncClient() used before.
+
+UPSTREAM_MAX_CONNECTIONS = int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.environ.get("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.environ.get("UPSTREAM_KEEPALIVE_EXPIRY", "5"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", "5"))
+UPSTREAM_POOL_TIMEOUT = float(os.environ.get("UPSTREAM_POOL_TIMEOUT", "5"))
+# "0"               -> HTTP/1.1 only
+# "1"               -> offer HTTP/2 through ALPN (only takes effect on https upstreams)
+# "prior-knowledge" -> speak HTTP/2 directly over cleartext http://
+UPSTREAM_HTTP2 = os.environ.get("UPSTREAM_HTTP2", "0")
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport to keep per-backend request counters."""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: dict):
+        self.transport = transport
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        try:
+            return await self.transport.handle_async_request(request)
+        except httpx.HTTPError:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class UpstreamPool:
+    """
+    One pooled httpx.AsyncClient per backend service.
+    Clients are opened in the app lifespan (or lazily on first use) and
+    closed on shutdown.
+    """
+
+    def __init__(self, backends: dict):
+        self.backends = backends
+        self.clients = {}
+        self.transports = {}
+        self.stats = {name: {"requests": 0, "in_flight": 0, "errors": 0} for name in backends}
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        http2 = UPSTREAM_HTTP2 in ("1", "prior-knowledge")
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+                keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+            ),
+            http1=UPSTREAM_HTTP2 != "prior-knowledge",
+            http2=http2,
+        )
+        self.transports[name] = transport
+        return httpx.AsyncClient(
+            transport=_CountingTransport(transport, self.stats[name]),
+            timeout=httpx.Timeout(
+                UPSTREAM_READ_TIMEOUT,
+                connect=UPSTREAM_CONNECT_TIMEOUT,
+                pool=UPSTREAM_POOL_TIMEOUT,
+            ),
+        )
+
+    def open(self) -> None:
+        for name in self.backends:
+            self.client(name)
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        client = self.clients.get(name)
+        if client is None or client.is_closed:
+            client = self.clients[name] = self._build(name)
+        return client
+
+    async def close(self) -> None:
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def snapshot(self) -> dict:
+        """Request counters plus live connection counts for each backend."""
+        result = {}
+        for name, base_url in self.backends.items():
+            connections = []
+            pool = getattr(self.transports.get(name), "_pool", None)
+            if pool is not None and name in self.clients:
+                connections = pool.connections
+            result[name] = {
+                "url": base_url,
+                **self.stats[name],
+                "connections": len(connections),
+                "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+                "max_connections": UPSTREAM_MAX_CONNECTIONS,
+                "max_keepalive_connections": UPSTREAM_MAX_KEEPALIVE,
+                "http2": UPSTREAM_HTTP2,
+            }
+        return result
+
+
+upstream = UpstreamPool({"book": BOOK_SERVICE_URL, "customer": CUSTOMER_SERVICE_URL})
+
+
+# ---------------------------
+# Conditional GET (ETags)
+# ---------------------------
+# Book and customer reads carry a strong ETag from the backend. The BFF keeps
+# the last body it received for each upstream URL and revalidates it with
+# If-None-Match: when nothing changed the backend answers 304 (for books
+# without even serializing) and the body is not sent again. Clients that
+# send If-None-Match themselves get a 304 without a body.
+
+REVALIDATION_CACHE_SIZE = int(os.environ.get("REVALIDATION_CACHE_SIZE", "10000"))
+
+
+class RevalidationCache:
+    """Bounded LRU of upstream URL -> (ETag, decoded JSON body)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = {"not_modified": 0, "refreshed": 0}
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, etag: str, body) -> None:
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = (etag, body)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "entries": len(self.entries), "max_entries": self.max_entries}
+
+
+revalidation = RevalidationCache(REVALIDATION_CACHE_SIZE)
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """True when If-None-Match names `etag` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+async def revalidated_get(client: httpx.AsyncClient, url: str, params: Optional[dict] = None, if_none_match: Optional[str] = None):
+    """
+    GET `url`, revalidating the copy held here, and return (etag, body).
+    body is shared with the cache, so copy it before changing it. body is
+    None when nothing is held here but the backend confirmed the client's
+    own `if_none_match`.
+    """
+    key = str(httpx.URL(url, params=params))
+    cached = revalidation.get(key)
+    validator = cached[0] if cached else if_none_match
+    try:
+        response = await client.get(url, params=params, headers={"If-None-Match": validator} if validator else None)
+    except httpx.RequestError as exc:
+        raise upstream_unreachable(exc)
+    if response.status_code == 304:
+        revalidation.stats["not_modified"] += 1
+        return cached if cached else (response.headers.get("ETag"), None)
+    if not response.is_success:
+        revalidation.discard(key)
+        raise upstream_error(response)
+    revalidation.stats["refreshed"] += 1
+    etag, body = response.headers.get("ETag"), loads(response.content)
+    if etag:
+        revalidation.put(key, etag, body)
+    else:
+        revalidation.discard(key)
+    return etag, body
+
+
+def conditional_response(if_none_match: Optional[str], etag: Optional[str], body):
+    if body is None or etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag} if etag else None)
+    return FastJSONResponse(content=body, headers={"ETag": etag} if etag else None)
+
+
+# This BFF reshapes books and customers, so its representation needs its own
+# ETag: the backend's tag with MOBILE_ETAG_SUFFIX appended.
+MOBILE_ETAG_SUFFIX = "-m"
+
+
+def mobile_etag(etag: Optional[str]) -> Optional[str]:
+    if not etag or not etag.endswith('"'):
+        return etag
+    return etag[:-1] + MOBILE_ETAG_SUFFIX + '"'
+
+
+def backend_etags(if_none_match: Optional[str]) -> Optional[str]:
+    """The backend tags behind a client's If-None-Match list of mobile tags."""
+    if not if_none_match:
+        return None
+    suffix = MOBILE_ETAG_SUFFIX + '"'
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    tags = [tag[: -len(suffix)] + '"' for tag in tags if tag.endswith(suffix)]
+    return ", ".join(tags) or None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    upstream.open()
+    try:
+        yield
+    finally:
+        await upstream.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
 # ---------------------------
 # X-Client_Type Header Check
 # ---------------------------
@@ -25,6 +364,61 @@ def require_client_type(x_client_type: Optional[str] = Header(None)):
 ACCEPTED_USERS = {"starlord", "gamora", "drax", "rocket", "groot"}
 REQUIRED_ISSUER = "cmu.edu"
 JWT_ALGORITHM = "HS256"
+# With JWT_SECRET set, token signatures are verified (HS256) as well as the
+# claims; without it only the claims are checked, as before.
+JWT_SECRET = os.environ.get("JWT_SECRET") or None
+
+# Every route validates the bearer token, and clients send the same token
+# with request after request. The outcome is cached under the token's
+# SHA-256 digest: an accepted token until min(exp, JWT_CACHE_TTL), a
+# rejected one for JWT_NEGATIVE_TTL seconds.
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL = float(os.environ.get("JWT_CACHE_TTL", "300"))
+JWT_NEGATIVE_TTL = float(os.environ.get("JWT_NEGATIVE_TTL", "5"))
+
+
+class TokenCache:
+    """Bounded LRU of token digest -> (expires_at, claims, rejection detail)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "seconds": 0.0}
+
+    def get(self, key: bytes, now: float):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: bytes, expires_at: float, payload: Optional[dict], error: Optional[str]) -> None:
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = (expires_at, payload, error)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        checks = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        return {
+            "hits": self.stats["hits"],
+            "negative_hits": self.stats["negative_hits"],
+            "misses": self.stats["misses"],
+            "hit_ratio": round((checks - self.stats["misses"]) / checks, 4) if checks else None,
+            "avg_check_us": round(self.stats["seconds"] / checks * 1e6, 2) if checks else None,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "signatures_verified": JWT_SECRET is not None,
+        }
+
+
+token_cache = TokenCache(JWT_CACHE_SIZE)
+
 
 def validate_jwt_token(authorization: Optional[str] = Header(None)):
     if authorization is None:
@@ -35,12 +429,43 @@ def validate_jwt_token(authorization: Optional[str] = Header(None)):
 
     token = authorization.removeprefix("Bearer ").strip()
 
+    started = time.perf_counter()
+    now = time.time()
+    key = hashlib.sha256(token.encode()).digest()
+    entry = token_cache.get(key, now)
+    if entry is not None:
+        _, payload, error = entry
+        token_cache.stats["negative_hits" if error else "hits"] += 1
+    else:
+        token_cache.stats["misses"] += 1
+        try:
+            payload, error = check_token(token, now), None
+            expires_at = min(payload["exp"], now + JWT_CACHE_TTL)
+        except HTTPException as exc:
+            payload, error = None, exc.detail
+            expires_at = now + JWT_NEGATIVE_TTL
+        token_cache.put(key, expires_at, payload, error)
+    token_cache.stats["seconds"] += time.perf_counter() - started
+    if error:
+        raise HTTPException(status_code=401, detail=error)
+    return payload
+
+
+def check_token(token: str, now: float) -> dict:
+    """The token's claims, or HTTPException(401) naming what is wrong with it."""
     try:
         # Decode the token without verifying signature
         payload = jwt.get_unverified_claims(token)
     except Exception as e:
         raise HTTPException(status_code=401, detail="Malformed token")
 
+    # Validate the signature, when a secret is configured
+    if JWT_SECRET is not None:
+        try:
+            jws.verify(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        except JOSEError:
+            raise HTTPException(status_code=401, detail="Invalid token signature")
+
     # Validate "sub"
     sub = payload.get("sub")
     if sub not in ACCEPTED_USERS:
@@ -53,7 +478,6 @@ def validate_jwt_token(authorization: Optional[str] = Header(None)):
 
     # Validate "exp"
     exp_timestamp = payload.get("exp")
-    now = datetime.now(timezone.utc).timestamp()
     if exp_timestamp is None:
         raise HTTPException(status_code=401, detail="Missing 'exp' claim in token")
     if now > exp_timestamp:
@@ -70,62 +494,162 @@ async def create_book(book: dict, _=Depends(validate_jwt_token), __=Depends(requ
     Proxy POST request to create a new book.
     This calls the Django BookCreateAPIView at /books.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            print("book request body:", book)
-            response = await client.post(f"{BOOK_SERVICE_URL}/books/", json=book)
-            response.raise_for_status()
-        except httpx.HTTPError as exc:
-            error_body = exc.response.json()
-            raise HTTPException(
-                status_code=response.status_code if response is not None else 500,
-                detail=error_body
-            ) from exc
-        # Forward the Location header if provided
-        headers = {"Location": response.headers.get("Location")} if "Location" in response.headers else {}
-        return JSONResponse(content=response.json(), status_code=response.status_code, headers=headers)
+    client = upstream.client("book")
+    print("book request body:", book)
+    # The 201 status and the Location header are forwarded with the body.
+    return await passthrough(client, "POST", f"{BOOK_SERVICE_URL}/books/", json=book)
+
+@app.get("/books")
+async def list_books(after: Optional[str] = Query(None), limit: Optional[str] = Query(None), isbn: Optional[str] = Query(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy GET request to page through books ordered by ISBN.
+    This calls the Django BookCreateAPIView (GET) at /books; pass the
+    returned "next" value back as ?after= to get the following page.
+    With ?isbn=a,b,c it returns exactly those books as {"items", "missing"}.
+    """
+    params = {name: value for name, value in (("after", after), ("limit", limit), ("isbn", isbn)) if value is not None}
+    response = await upstream_request(upstream.client("book"), "GET", f"{BOOK_SERVICE_URL}/books/", params=params)
+    page = loads(response.content)
+    for book in page["items"]:
+        if book.get("genre") == "non-fiction":
+            book["genre"] = 3
+    return page
+
+@app.get("/books/autocomplete")
+async def autocomplete_books(q: Optional[str] = Query(None), limit: Optional[str] = Query(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy GET request for title/author type-ahead suggestions.
+    This calls the Django BookAutocompleteAPIView at /books/autocomplete.
+    """
+    params = {name: value for name, value in (("q", q), ("limit", limit)) if value is not None}
+    client = upstream.client("book")
+    return await passthrough(client, "GET", f"{BOOK_SERVICE_URL}/books/autocomplete", params=params)
+
+@app.get("/books/search")
+async def search_books(
+    q: Optional[str] = Query(None),
+    genre: Optional[str] = Query(None),
+    min_price: Optional[str] = Query(None),
+    max_price: Optional[str] = Query(None),
+    page: Optional[str] = Query(None),
+    limit: Optional[str] = Query(None),
+    _=Depends(validate_jwt_token),
+    __=Depends(require_client_type),
+):
+    """
+    Proxy GET request to search the catalog by title, author and description.
+    This calls the Django BookSearchAPIView at /books/search; results are
+    relevance-ranked and paginated with ?page=&limit=.
+    """
+    params = {
+        name: value
+        for name, value in (
+            ("q", q), ("genre", genre), ("min_price", min_price),
+            ("max_price", max_price), ("page", page), ("limit", limit),
+        )
+        if value is not None
+    }
+    response = await upstream_request(upstream.client("book"), "GET", f"{BOOK_SERVICE_URL}/books/search", params=params)
+    page = loads(response.content)
+    for book in page["items"]:
+        if book.get("genre") == "non-fiction":
+            book["genre"] = 3
+    return page
+
+@app.post("/books/_batch")
+async def batch_books(batch: dict, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy POST request to look up many books in one round trip.
+    This calls the Django BookBatchAPIView at /books/_batch with
+    {"isbns": [...]} and returns {"items": [...], "missing": [...]}.
+    """
+    response = await upstream_request(upstream.client("book"), "POST", f"{BOOK_SERVICE_URL}/books/_batch", json=batch)
+    found = loads(response.content)
+    for book in found["items"]:
+        if book.get("genre") == "non-fiction":
+            book["genre"] = 3
+    return found
+
+@app.post("/books/_reserve")
+async def reserve_books(body: dict, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy POST request to reserve stock of several books, all or nothing.
+    This calls the Django BookBatchReserveAPIView at /books/_reserve with
+    {"items": [{"ISBN": ..., "quantity": n}, ...]}.
+    """
+    client = upstream.client("book")
+    return await passthrough(client, "POST", f"{BOOK_SERVICE_URL}/books/_reserve", json=body)
+
+@app.get("/books/export")
+async def export_books(format: str = Query("ndjson"), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy GET request to stream the whole catalog as NDJSON or CSV.
+    This calls the Django BookExportView at /books/export; the body is relayed
+    chunk by chunk and never held in memory here.
+    """
+    client = upstream.client("book")
+    request = client.build_request("GET", f"{BOOK_SERVICE_URL}/books/export", params={"format": format})
+    try:
+        response = await client.send(request, stream=True)
+        if response.is_error:
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+    except httpx.RequestError as exc:
+        raise upstream_unreachable(exc)
+    if response.is_error:
+        raise HTTPException(status_code=response.status_code, detail=response.text.strip() or str(response.status_code))
+    headers = {name: response.headers[name] for name in ("Content-Type", "Content-Disposition") if name in response.headers}
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=headers,
+        background=BackgroundTask(response.aclose),
+    )
 
 @app.get("/books/{isbn}")
-async def get_book(isbn: str, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+async def get_book(isbn: str, if_none_match: Optional[str] = Header(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
     """
     Proxy GET request to retrieve a book by its ISBN.
     This calls the Django BookDetailAPIView (GET) at /books/<isbn>.
+    Conditional: answers 304 when If-None-Match names the current ETag.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{BOOK_SERVICE_URL}/books/{isbn}")
-            response.raise_for_status()
-            response = response.json()
-            if response.get("genre") == "non-fiction":
-                response["genre"] = 3
-            return response
-        except httpx.HTTPError as exc:
-            error_body = exc.response.json()
-            raise HTTPException(
-                status_code=response.status_code if response is not None else 500,
-                detail=error_body
-            ) from exc
+    etag, book = await revalidated_get(
+        upstream.client("book"), f"{BOOK_SERVICE_URL}/books/{isbn}", if_none_match=backend_etags(if_none_match)
+    )
+    if book is not None:
+        book = dict(book)
+        if book.get("genre") == "non-fiction":
+            book["genre"] = 3
+    return conditional_response(if_none_match, mobile_etag(etag), book)
 
 @app.get("/books/isbn/{isbn}")
-async def get_book_by_isbn(isbn: str, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+async def get_book_by_isbn(isbn: str, if_none_match: Optional[str] = Header(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
     """
     Proxy GET request to retrieve a book by its ISBN.
     This calls the Django BookDetailAPIView (GET) at /books/isbn/<isbn>.
+    Conditional: answers 304 when If-None-Match names the current ETag.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{BOOK_SERVICE_URL}/books/isbn/{isbn}")
-            response.raise_for_status()
-            response = response.json()
-            if response.get("genre") == "non-fiction":
-                response["genre"] = 3
-            return response
-        except httpx.HTTPError as exc:
-            error_body = exc.response.json()
-            raise HTTPException(
-                status_code=response.status_code if response is not None else 500,
-                detail=error_body
-            ) from exc
+    etag, book = await revalidated_get(
+        upstream.client("book"), f"{BOOK_SERVICE_URL}/books/isbn/{isbn}", if_none_match=backend_etags(if_none_match)
+    )
+    if book is not None:
+        book = dict(book)
+        if book.get("genre") == "non-fiction":
+            book["genre"] = 3
+    return conditional_response(if_none_match, mobile_etag(etag), book)
+
+async def write_book(method: str, isbn: str, book: dict, headers: Optional[dict] = None) -> FastJSONResponse:
+    """Send a PUT/PATCH upstream; answer with the mobile body and the mobile ETag."""
+    response = await upstream_request(upstream.client("book"), method, f"{BOOK_SERVICE_URL}/books/{isbn}", json=book, headers=headers)
+    # Forward the new version, as GET would tag it, so the client can chain
+    # conditional edits and revalidate against it.
+    headers = {"ETag": mobile_etag(response.headers["ETag"])} if "ETag" in response.headers else {}
+    response = loads(response.content)
+    if response.get("genre") == "non-fiction":
+        response["genre"] = 3
+    return FastJSONResponse(content=response, headers=headers)
 
 @app.put("/books/{isbn}")
 async def update_book(isbn: str, book: dict, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
@@ -133,64 +657,82 @@ async def update_book(isbn: str, book: dict, _=Depends(validate_jwt_token), __=D
     Proxy PUT request to update a book.
     This calls the Django BookDetailAPIView (PUT) at /books/<isbn>.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.put(f"{BOOK_SERVICE_URL}/books/{isbn}", json=book)
-            response.raise_for_status()
-        except httpx.HTTPError as exc:
-            error_body = exc.response.json()
-            raise HTTPException(
-                status_code=response.status_code if response is not None else 500,
-                detail=error_body
-            ) from exc
-        return response.json()
+    return await write_book("PUT", isbn, book)
+
+@app.patch("/books/{isbn}")
+async def patch_book(isbn: str, book: dict, if_match: Optional[str] = Header(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy PATCH request to update only the supplied fields of a book.
+    This calls the Django BookDetailAPIView (PATCH) at /books/<isbn>; If-Match
+    is forwarded so a stale edit fails with 412 instead of overwriting.
+    """
+    # Mobile tags carry MOBILE_ETAG_SUFFIX; the backend knows the bare ones.
+    headers = {"If-Match": backend_etags(if_match) or if_match} if if_match else None
+    return await write_book("PATCH", isbn, book, headers)
+
+@app.post("/books/{isbn}/reserve")
+async def reserve_book(isbn: str, body: dict, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy POST request to reserve {"quantity": n} copies of one book.
+    This calls the Django BookReserveAPIView at /books/<isbn>/reserve and
+    returns the new stock level (409 when not enough copies are left).
+    """
+    client = upstream.client("book")
+    return await passthrough(client, "POST", f"{BOOK_SERVICE_URL}/books/{isbn}/reserve", json=body)
 
 @app.get("/books/{isbn}/related-books")
 async def get_related_books(isbn: str, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
     """
     Proxy GET request to retrieve related books by ISBN.
-    This calls the Django BookRelatedAPIView at /books/<isbn>/related-books.
+    This calls the Django BookRelatedAPIView at /books/<isbn>/related-books,
+    served by the book service's ASGI server.
     """
-    async with httpx.AsyncClient() as client:
-        # 1) Fetch
-        response = await client.get(f"{BOOK_SERVICE_URL}/books/{isbn}/related-books")
-
-        # 2) Handle 204 No Content up front
-        if response.status_code == 204:
-            return Response(status_code=204)
-
-        # 3) Raise for any 4xx/5xx
-        try:
-            response.raise_for_status()
-        except httpx.HTTPStatusError as exc:
-            status = exc.response.status_code
+    client = upstream.client("book")
+    # 1) Fetch
+    response = await client.get(f"{BOOK_ASYNC_SERVICE_URL}/books/{isbn}/related-books")
 
-            # forward 503 and 504 as is
-            if status in {503, 504}:
-                return JSONResponse(status_code=status, content={"detail": str(status)})
+    # 2) Handle 204 No Content up front
+    if response.status_code == 204:
+        return Response(status_code=204)
 
-            # other errors → try to pull JSON body, else fallback to text
-            try:
-                err = exc.response.json()
-            except Exception:
-                err = {"detail": exc.response.text.strip() or str(status)}
+    # 3) Raise for any 4xx/5xx
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        status = exc.response.status_code
 
-            raise HTTPException(status_code=status, detail=err)
+        # forward 503 and 504 as is
+        if status in {503, 504}:
+            return FastJSONResponse(status_code=status, content={"detail": str(status)})
 
-        # 4) 200 OK → parse JSON
+        # other errors → try to pull JSON body, else fallback to text
         try:
-            return response.json()
+            err = loads(exc.response.content)
         except Exception:
-            # this should never happen if upstream is well‑behaved
-            return JSONResponse(
-                status_code=500,
-                content={"detail": "Invalid JSON from Book Service"},
-            )
+            err = {"detail": exc.response.text.strip() or str(status)}
+
+        raise HTTPException(status_code=status, detail=err)
+
+    # 4) 200 OK → parse JSON
+    try:
+        return loads(response.content)
+    except Exception:
+        # this should never happen if upstream is well‑behaved
+        return FastJSONResponse(
+            status_code=500,
+            content={"detail": "Invalid JSON from Book Service"},
+        )
 
 
 # ---------------------------
 # Customer Endpoints
 # ---------------------------
+# The mobile app never shows addresses, so customer reads ask the customer
+# service for just these columns (?fields=) instead of dropping the address
+# fields here after a full fetch.
+MOBILE_CUSTOMER_FIELDS = "id,userId,name,phone"
+# A bulk import answers only once every row is written, far later than UPSTREAM_READ_TIMEOUT.
+BULK_IMPORT_TIMEOUT = float(os.environ.get("BULK_IMPORT_TIMEOUT", "300"))
 
 @app.post("/customers")
 async def create_customer(customer: dict, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
@@ -198,86 +740,149 @@ async def create_customer(customer: dict, _=Depends(validate_jwt_token), __=Depe
     Proxy POST request to create a new customer.
     This calls the Django CustomerListCreateAPIView (POST) at /customers.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(f"{CUSTOMER_SERVICE_URL}/customers/", json=customer)
-            response.raise_for_status()
-        except httpx.HTTPError as exc:
-            error_body = exc.response.json()
-            raise HTTPException(
-                status_code=response.status_code if response is not None else 500,
-                detail=error_body
-            ) from exc
-        headers = {"Location": response.headers.get("Location")} if "Location" in response.headers else {}
-        return JSONResponse(content=response.json(), status_code=response.status_code, headers=headers)
+    client = upstream.client("customer")
+    # The 201 status and the Location header are forwarded with the body.
+    return await passthrough(client, "POST", f"{CUSTOMER_SERVICE_URL}/customers/", json=customer)
+
+@app.post("/customers/_bulk")
+async def bulk_import_customers(request: Request, chunk_size: Optional[str] = Query(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Proxy POST request to import many customers from NDJSON or CSV.
+    This calls the Django CustomerBulkImportAPIView at /customers/_bulk; the
+    upload is streamed through, never held in memory here, and the import
+    report ({"received", "created", "failed", "errors"}) is returned.
+    """
+    # Django reads a request body only up to its Content-Length, so the
+    # upload is relayed with the client's length rather than chunked.
+    if "Content-Length" not in request.headers:
+        raise HTTPException(status_code=411, detail="Content-Length required")
+    params = {"chunk_size": chunk_size} if chunk_size is not None else {}
+    headers = {name: request.headers[name] for name in ("Content-Type", "Content-Length") if name in request.headers}
+    return await passthrough(
+        upstream.client("customer"), "POST", f"{CUSTOMER_SERVICE_URL}/customers/_bulk",
+        params=params, headers=headers, content=request.stream(), timeout=BULK_IMPORT_TIMEOUT,
+    )
 
 @app.get("/customers")
-async def get_customer(userId: Optional[str] = Query(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+async def get_customer(
+    userId: Optional[str] = Query(None),
+    ids: Optional[str] = Query(None),
+    userIds: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    _=Depends(validate_jwt_token),
+    __=Depends(require_client_type),
+):
     """
     Proxy GET request to look up a customer by userId.
     This calls the Django CustomerListCreateAPIView (GET) at /customers with query parameter userId.
+    Conditional: answers 304 when If-None-Match names the current ETag.
+    With ?ids=1,2,3 or ?userIds=a,b,c it returns exactly those customers as {"items", "missing"}.
     """
+    if ids is not None or userIds is not None:
+        params = {name: value for name, value in (("userId", userId), ("ids", ids), ("userIds", userIds)) if value is not None}
+        # Batch items are narrowed to the same columns as single reads.
+        params["fields"] = MOBILE_CUSTOMER_FIELDS
+        return await passthrough(upstream.client("customer"), "GET", f"{CUSTOMER_SERVICE_URL}/customers/", params=params)
     if not userId:
         raise HTTPException(status_code=400, detail="Missing query parameter 'userId'")
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{CUSTOMER_SERVICE_URL}/customers/", params={"userId": userId})
-            response.raise_for_status()
-            response = response.json()
-            for field in ["address", "address2", "city", "state", "zipcode"]:
-                response.pop(field, None)
-            return response
-        except httpx.HTTPError as exc:
-            error_body = exc.response.json()
-            raise HTTPException(
-                status_code=response.status_code if response is not None else 500,
-                detail=error_body
-            ) from exc
+    etag, customer = await revalidated_get(
+        upstream.client("customer"), f"{CUSTOMER_SERVICE_URL}/customers/",
+        params={"userId": userId, "fields": MOBILE_CUSTOMER_FIELDS}, if_none_match=backend_etags(if_none_match)
+    )
+    return conditional_response(if_none_match, mobile_etag(etag), customer)
 
 @app.get("/customers/{id}")
-async def get_customer_detail(id: str, _=Depends(validate_jwt_token), __=Depends(require_client_type)):
+async def get_customer_detail(id: str, if_none_match: Optional[str] = Header(None), _=Depends(validate_jwt_token), __=Depends(require_client_type)):
     """
     Proxy GET request to retrieve customer details by id.
     This calls the Django CustomerDetailAPIView (GET) at /customers/<id>.
+    Conditional: answers 304 when If-None-Match names the current ETag.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{CUSTOMER_SERVICE_URL}/customers/{id}")
-            response.raise_for_status()
-            response = response.json()
-            for field in ["address", "address2", "city", "state", "zipcode"]:
-                response.pop(field, None)
-            return response
-        except httpx.HTTPError as exc:
-            error_body = exc.response.json()
-            raise HTTPException(
-                status_code=response.status_code if response is not None else 500,
-                detail=error_body
-            ) from exc
+    etag, customer = await revalidated_get(
+        upstream.client("customer"), f"{CUSTOMER_SERVICE_URL}/customers/{id}",
+        params={"fields": MOBILE_CUSTOMER_FIELDS}, if_none_match=backend_etags(if_none_match)
+    )
+    return conditional_response(if_none_match, mobile_etag(etag), customer)
 
 # ---------------------------
 # Health Check Endpoint
 # ---------------------------
+# /status is polled by liveness probes and monitors. Both backends are
+# checked at once, and the combined answer is reused for STATUS_CACHE_TTL
+# seconds. A probe that finds it stale still gets the last answer right
+# away while one background task re-checks, so probes never queue up behind
+# a slow backend. Only the first probe after startup waits, and for at most
+# STATUS_CHECK_TIMEOUT.
+
+STATUS_CACHE_TTL = float(os.environ.get("STATUS_CACHE_TTL", "2"))
+STATUS_CHECK_TIMEOUT = float(os.environ.get("STATUS_CHECK_TIMEOUT", "2"))
+STATUS_PATHS = {"book": "/books/status", "customer": "/customers/status"}
+
+
+class HealthCheck:
+    """The last combined backend status, refreshed in the background."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.checked_at = None
+        self.dependencies = None
+        self.lock = asyncio.Lock()
+        self.refreshing = None
+
+    async def check(self, name: str, path: str):
+        started = time.perf_counter()
+        try:
+            response = await upstream.client(name).get(upstream.backends[name] + path, timeout=STATUS_CHECK_TIMEOUT)
+            response.raise_for_status()
+            state, detail = "up", response.text.strip()
+        except httpx.HTTPError as exc:
+            state, detail = "down", str(exc) or type(exc).__name__
+        return name, {"state": state, "detail": detail, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    async def refresh(self) -> None:
+        results = await asyncio.gather(*(self.check(name, path) for name, path in STATUS_PATHS.items()))
+        self.dependencies, self.checked_at = dict(results), time.monotonic()
+
+    async def current(self):
+        """(dependencies, age in seconds); checks first only if nothing is known yet."""
+        if self.checked_at is None:
+            async with self.lock:
+                if self.checked_at is None:
+                    await self.refresh()
+        elif time.monotonic() - self.checked_at > self.ttl and (self.refreshing is None or self.refreshing.done()):
+            self.refreshing = asyncio.create_task(self.refresh())
+        return self.dependencies, time.monotonic() - self.checked_at
+
+
+health = HealthCheck(STATUS_CACHE_TTL)
+
 
 @app.get("/status")
 async def status():
     """
     Health check endpoint.
-    Proxies the status call to the Book Service's /status endpoint.
-    The Django status endpoint returns a plain text "OK".
+    Checks the Book and Customer Services' /status endpoints (which return a
+    plain text "OK") and reports each one's state and latency. 500 when
+    either is down.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{BOOK_SERVICE_URL}/books/status")
-            response.raise_for_status()
-            response = await client.get(f"{CUSTOMER_SERVICE_URL}/customers/status")
-            response.raise_for_status()
-        except httpx.HTTPError as exc:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Backend status check failed: {exc}"
-            )
-        return {"status": response.text.strip()}
+    dependencies, age = await health.current()
+    down = [name for name, dependency in dependencies.items() if dependency["state"] != "up"]
+    # "status" is the customer service's answer when all is well, as it always was.
+    status = "DOWN" if down else dependencies["customer"]["detail"]
+    body = {"status": status, "age_ms": round(age * 1000, 1), "dependencies": dependencies}
+    if down:
+        body["detail"] = "Backend status check failed: " + "; ".join(f"{name}: {dependencies[name]['detail']}" for name in down)
+        return FastJSONResponse(status_code=500, content=body)
+    return body
+
+@app.get("/_stats")
+async def stats(_=Depends(validate_jwt_token), __=Depends(require_client_type)):
+    """
+    Internal tuning endpoint.
+    Reports per-backend connection pool usage, ETag revalidation counters
+    and the token validation cache.
+    """
+    return {"upstream": upstream.snapshot(), "revalidation": revalidation.snapshot(), "auth": token_cache.snapshot()}
 
 # ---------------------------
 # Main entry point